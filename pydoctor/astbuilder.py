@@ -3,10 +3,17 @@
 from __future__ import print_function
 
 import ast
+import hashlib
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
 from itertools import chain
 
-import astor
-from pydoctor import epydoc2stan, model
+from pydoctor import __version__, epydoc2stan, model
+from pydoctor.astutils import node2source
+from pydoctor.stats import Stats
 from six import string_types
 
 
@@ -22,6 +29,124 @@ def parse(buf):
     return ast.parse(buf)
 
 
+def tryParseFile(path, cache=None):
+    """Parse a Python source file, using the L{ASTCache} C{cache} if given.
+
+    @return: The AST, or C{None} if the file could not be parsed.
+    """
+    try:
+        if cache is not None:
+            return cache.parseFile(path)
+        else:
+            return parseFile(path)
+    except (SyntaxError, ValueError):
+        return None
+
+
+# The ASTCache and the Stats to use in worker processes forked by
+# parseFiles.
+_worker_cache = None
+_worker_stats = None
+
+def _parseInWorker(paths):
+    stats = _worker_stats.forWorker()
+    trees = []
+    for path in paths:
+        with stats.span('parsing'):
+            trees.append(tryParseFile(path, _worker_cache))
+    return trees, stats.asDict(), stats.profileData()
+
+def parseFiles(paths, jobs, cache=None, stats=None):
+    """Parse several Python source files in C{jobs} forked worker processes.
+
+    @param cache: An L{ASTCache} for the workers to use, if any.
+    @param stats: The L{Stats} to add the time the workers spend parsing
+        to, as the C{parsing} span, if any.
+    @return: A dict mapping each path to its AST, or to C{None} if the file
+        could not be parsed.  If worker processes cannot be forked on this
+        platform, the dict is empty.
+    """
+    global _worker_cache, _worker_stats
+    try:
+        context = multiprocessing.get_context('fork')
+    except AttributeError: # Python 2 always forks.
+        context = multiprocessing
+    except ValueError:
+        return {}
+    if stats is None:
+        stats = Stats()
+    paths = sorted(paths)
+    chunksize = max(1, len(paths) // (jobs * 8))
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    _worker_cache = cache
+    _worker_stats = stats
+    pool = context.Pool(jobs)
+    trees = []
+    try:
+        for chunktrees, data, profiles in pool.imap(_parseInWorker, chunks):
+            trees.extend(chunktrees)
+            stats.merge(data, profiles)
+    finally:
+        pool.terminate()
+        pool.join()
+        _worker_cache = None
+        _worker_stats = None
+    return dict(zip(paths, trees))
+
+
+class ASTCache(object):
+    """A persistent, on-disk cache of parsed module ASTs.
+
+    Entries are keyed by a hash of the source file contents, the pydoctor
+    version and the Python version, so an unchanged module can be loaded
+    without running the parser at all.  Entries never need to be
+    invalidated explicitly: editing a file simply changes its key.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._salt = ('pydoctor %s python %s' % (
+            __version__.short(), sys.version)).encode('utf-8')
+
+    def _entryPath(self, src):
+        digest = hashlib.sha256(self._salt)
+        digest.update(src)
+        return os.path.join(self.directory, digest.hexdigest() + '.ast')
+
+    def parseFile(self, path):
+        """Parse the contents of a Python source file, using the cache if
+        possible.
+
+        @raise SyntaxError: If the file cannot be parsed.
+        """
+        with open(path, 'rb') as f:
+            src = f.read() + b'\n'
+        entry = self._entryPath(src)
+        try:
+            with open(entry, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Missing, truncated or otherwise unusable entry: parse again.
+            pass
+        tree = parse(src)
+        self._store(entry, tree)
+        return tree
+
+    def _store(self, entry, tree):
+        # Write to a temporary file first so that concurrent builds sharing
+        # a cache directory never see a partially written entry.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(tree, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp, entry)
+        except (OSError, IOError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
 def node2dottedname(node):
     parts = []
     while isinstance(node, ast.Attribute):
@@ -82,7 +207,7 @@ class ModuleVistor(ast.NodeVisitor):
             if isinstance(n, ast.Name):
                 str_base = n.id
             else:
-                str_base = astor.to_source(n).strip()
+                str_base = node2source(n)
 
             rawbases.append(str_base)
             full_name = self.builder.current.expandName(str_base)
@@ -136,6 +261,10 @@ class ModuleVistor(ast.NodeVisitor):
         self.builder.popClass()
 
     def visit_ImportFrom(self, node):
+        with self.system.stats.span('imports'):
+            self._importFrom(node)
+
+    def _importFrom(self, node):
         if not isinstance(self.builder.current, model.CanContainImportsDocumentable):
             self.builder.warning("processing import statement in odd context",
                                  str(self.builder.current))
@@ -195,6 +324,10 @@ class ModuleVistor(ast.NodeVisitor):
             _localNameToFullName[asname] = expandName(fromname)
 
     def visit_Import(self, node):
+        with self.system.stats.span('imports'):
+            self._import(node)
+
+    def _import(self, node):
         """Process an import statement.
 
         The grammar for the statement is roughly:
@@ -401,12 +534,53 @@ class ModuleVistor(ast.NodeVisitor):
             if isinstance(default, ast.Num):
                 defaults.append(str(default.n))
             else:
-                defaults.append(astor.to_source(default).strip())
+                defaults.append(node2source(default))
 
         func.argspec = (args, varargname, kwargname, tuple(defaults))
-        self.default(node)
+        if not self.system.options.skimfunctionbodies:
+            self.default(node)
+        elif isinstance(func.parent, model.Class):
+            self._skimMethod(node)
         self.builder.popFunction()
 
+    def _skimMethod(self, node):
+        """Visit the assignments to attributes of C{self} in the body of a
+        method, and the docstrings after them, like L{default} would, but
+        nothing else.
+        """
+        self.currAttr = None
+        for child in node.body:
+            self.newAttr = None
+            self._skimStatement(child)
+            self.currAttr = self.newAttr
+        self.newAttr = None
+
+    def _skimStatement(self, node):
+        if isinstance(node, ast.Assign):
+            if len(node.targets) == 1 and _isSelfAttribute(node.targets[0]):
+                self.visit(node)
+        elif isinstance(node, getattr(ast, 'AnnAssign', ())):
+            if _isSelfAttribute(node.target):
+                self.visit(node)
+        elif isinstance(node, ast.Expr):
+            if isinstance(node.value, ast.Str):
+                self.visit(node)
+        elif not isinstance(node, _FUNCTION_DEFS + (ast.ClassDef,)):
+            # Look into the blocks of compound statements.
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, _BLOCKS):
+                    self._skimStatement(child)
+
+
+def _isSelfAttribute(node):
+    return isinstance(node, ast.Attribute) and \
+           isinstance(node.value, ast.Name) and node.value.id == 'self'
+
+# The nodes that contain the statements of compound statements.
+_BLOCKS = tuple(
+    getattr(ast, name) for name in ('stmt', 'excepthandler', 'match_case')
+    if hasattr(ast, name))
+
 
 def _annotation_from_attrib(expr, ctx):
     """Get the type of an C{attr.ib} definition.
@@ -565,29 +739,31 @@ class ASTBuilder(object):
         self.system._warning(self.current, type, detail)
 
     def processModuleAST(self, ast, mod):
-        findAll(ast, mod)
-
-        self.ModuleVistor(self, mod).visit(ast)
+        with self.system.stats.span('visiting'):
+            findAll(ast, mod)
+            self.ModuleVistor(self, mod).visit(ast)
 
     def expandModname(self, modname):
-        if '.' in modname:
-            prefix, suffix = modname.split('.', 1)
-            suffix = '.' + suffix
-        else:
-            prefix, suffix = modname, ''
-        package = self.current.parentMod.parent
-        while package is not None:
-            if prefix in package.contents:
-                self.warning("local import", modname)
-                return package.contents[prefix].fullName() + suffix
-            package = package.parent
-        return modname
+        fullName, local = _expandModname(self.current.parentMod.parent, modname)
+        if local:
+            self.warning("local import", modname)
+        return fullName
 
     def parseFile(self, filePath):
         if filePath in self.ast_cache:
             return self.ast_cache[filePath]
+        if filePath in self.system.parsed_modules:
+            ast = self.system.parsed_modules.pop(filePath)
+            if ast is None:
+                self.warning("cannot parse", filePath)
+            self.ast_cache[filePath] = ast
+            return ast
         try:
-            ast = parseFile(filePath)
+            with self.system.stats.span('parsing'):
+                if self.system.astcache is not None:
+                    ast = self.system.astcache.parseFile(filePath)
+                else:
+                    ast = parseFile(filePath)
         except (SyntaxError, ValueError):
             self.warning("cannot parse", filePath)
             ast = None
@@ -596,6 +772,61 @@ class ASTBuilder(object):
 
 model.System.defaultBuilder = ASTBuilder
 
+def _expandModname(package, modname):
+    """Return the full name of the module C{modname} imported in
+    C{package}, and whether it is a (Python 2 style) relative import."""
+    if '.' in modname:
+        prefix, suffix = modname.split('.', 1)
+        suffix = '.' + suffix
+    else:
+        prefix, suffix = modname, ''
+    while package is not None:
+        if prefix in package.contents:
+            return package.contents[prefix].fullName() + suffix, True
+        package = package.parent
+    return modname, False
+
+_FUNCTION_DEFS = tuple(
+    getattr(ast, name) for name in ('FunctionDef', 'AsyncFunctionDef')
+    if hasattr(ast, name))
+
+def _importStatements(stmts):
+    for node in stmts:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, _FUNCTION_DEFS):
+            # Imports in functions are not processed.
+            continue
+        for field in 'body', 'orelse', 'finalbody', 'handlers':
+            body = getattr(node, field, None)
+            if body:
+                for imp in _importStatements(body):
+                    yield imp
+
+def findImportedModules(modast, mod):
+    """Return the full names of the modules that processing the module
+    C{mod}, parsed into C{modast}, may need to be processed first, in the
+    order its import statements ask for them.
+
+    Only statements are scanned, not expressions, which is cheap compared
+    to visiting the module.  For C{from package import name}, both
+    C{package} and C{package.name} are returned, as the name may be a
+    submodule.  Not all of the names are necessarily modules of the system.
+    """
+    package = mod.parent
+    names = []
+    for node in _importStatements(modast.body):
+        if isinstance(node, ast.Import):
+            for al in node.names:
+                names.append(_expandModname(package, al.name)[0])
+        elif node.module is not None:
+            modname = _expandModname(package, node.module)[0]
+            names.append(modname)
+            for al in node.names:
+                if al.name != '*':
+                    names.append(modname + '.' + al.name)
+    return names
+
 def findAll(modast, mod):
     """Find and attempt to parse into a list of names the __all__ of a module's AST."""
     for node in modast.body:
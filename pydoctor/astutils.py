@@ -0,0 +1,178 @@
+"""Turning expressions back into source code.
+
+L{node2source} gives the same result as C{astor.to_source(node).strip()},
+which pydoctor used everywhere before, but the small expressions found in
+base classes, default values, decorators and annotations are written out
+directly, without astor's general purpose source generator.  Everything
+else is still left to astor.
+"""
+
+from __future__ import print_function
+
+import ast
+import math
+
+import astor
+from astor.string_repr import pretty_string
+from six import integer_types, string_types
+
+# The number types whose repr is their source, bool excluded.
+_NUMBERS = integer_types + (float,)
+
+# The longest line astor writes out without breaking it.
+_MAX_LINE = 79
+
+
+def node2source(node):
+    """Return the source of the expression C{node}.
+
+    The result is remembered on the node, so asking again is cheap; the
+    node should not be changed afterwards.
+    """
+    try:
+        return node._pydoctor_source
+    except AttributeError:
+        pass
+    source = _expression(node, True)
+    if source is None or len(source) > _MAX_LINE:
+        # astor breaks long lines, let it work out where.
+        source = astor.to_source(node).strip()
+    node._pydoctor_source = source
+    return source
+
+
+def _constant(node):
+    """Return C{(value, kind)} if C{node} is a constant, else C{None}."""
+    if isinstance(node, getattr(ast, 'Constant', ())):
+        return node.value, getattr(node, 'kind', None)
+    if isinstance(node, ast.Num):
+        return node.n, None
+    if isinstance(node, ast.Str):
+        return node.s, None
+    if isinstance(node, getattr(ast, 'NameConstant', ())):
+        return node.value, None
+    return None
+
+
+def _expression(node, root=False):
+    """Return the source of C{node} if it can be written out the way
+    astor does without knowing about operator precedence, else C{None}.
+
+    @param root: Whether C{node} is the whole expression, rather than part
+        of a call, subscript or display, where astor writes some constants
+        differently.
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        value = _primary(node.value)
+        return None if value is None else value + '.' + node.attr
+    if isinstance(node, ast.Call):
+        return _call(node)
+    if isinstance(node, ast.Subscript):
+        return _subscript(node)
+    if isinstance(node, ast.List):
+        elts = _expressions(node.elts)
+        return None if elts is None else '[' + ', '.join(elts) + ']'
+    if isinstance(node, ast.Tuple):
+        elts = _expressions(node.elts)
+        if elts is None:
+            return None
+        if len(elts) == 1:
+            return '(' + elts[0] + ',)'
+        return '(' + ', '.join(elts) + ')'
+    constant = _constant(node)
+    if constant is not None:
+        return _constantSource(constant[0], constant[1], root)
+    return None
+
+
+def _primary(node):
+    # What can come before '.', '(' or '[' without parentheses.
+    if isinstance(node, (ast.Name, ast.Attribute, ast.Call, ast.Subscript)):
+        return _expression(node)
+    return None
+
+
+def _expressions(nodes):
+    sources = []
+    for node in nodes:
+        if isinstance(node, getattr(ast, 'Starred', ())):
+            source = _expression(node.value)
+            if source is not None:
+                source = '*' + source
+        else:
+            source = _expression(node)
+        if source is None:
+            return None
+        sources.append(source)
+    return sources
+
+
+def _call(node):
+    if getattr(node, 'starargs', None) or getattr(node, 'kwargs', None):
+        return None
+    func = _primary(node.func)
+    if func is None:
+        return None
+    args = _expressions(node.args)
+    if args is None:
+        return None
+    for keyword in node.keywords:
+        value = _expression(keyword.value)
+        if value is None:
+            return None
+        if keyword.arg is None:
+            args.append('**' + value)
+        else:
+            args.append(keyword.arg + '=' + value)
+    return func + '(' + ', '.join(args) + ')'
+
+
+def _subscript(node):
+    value = _primary(node.value)
+    if value is None:
+        return None
+    index = node.slice
+    if isinstance(index, getattr(ast, 'Index', ())):
+        index = index.value
+    if isinstance(index, ast.Tuple):
+        if len(index.elts) < 2:
+            return None
+        elts = _expressions(index.elts)
+        if elts is None:
+            return None
+        index = ', '.join(elts)
+    else:
+        if not isinstance(index, ast.expr):
+            # A slice.
+            return None
+        index = _expression(index)
+        if index is None:
+            return None
+    return value + '[' + index + ']'
+
+
+def _constantSource(value, kind, root):
+    if value is None or value is Ellipsis:
+        return repr(value) if value is None else '...'
+    if isinstance(value, bool):
+        return '(%r)' % (value,) if root else repr(value)
+    if isinstance(value, _NUMBERS):
+        if value < 0 or (isinstance(value, float) and
+                         (math.isinf(value) or math.isnan(value))):
+            return None
+        return '(%r)' % (value,) if root else repr(value)
+    if isinstance(value, bytes) and not isinstance(value, str):
+        return repr(value)
+    if isinstance(value, string_types):
+        if '\r' in value:
+            return None
+        if root:
+            source = pretty_string(value, 0, '')
+        elif '\n' in value:
+            return None
+        else:
+            source = repr(value)
+        return (kind or '') + source
+    return None
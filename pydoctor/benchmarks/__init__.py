@@ -0,0 +1,7 @@
+"""Benchmarks for the pydoctor pipeline.
+
+Run C{python -m pydoctor.benchmarks --help} for the options.  The benchmark
+generates a synthetic package of the requested size (see L{synthetic}),
+documents it while timing each stage separately (see L{run}) and prints the
+results as JSON.
+"""
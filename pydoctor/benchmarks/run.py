@@ -0,0 +1,181 @@
+"""Time the stages of documenting a synthetic package."""
+
+from __future__ import print_function
+
+import json
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from pydoctor import __version__, zopeinterface
+from pydoctor.benchmarks.synthetic import PackageShape, generatePackage
+from pydoctor.driver import parse_args
+from pydoctor.sphinx import SphinxInventoryWriter
+from pydoctor.templatewriter import TemplateWriter
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+
+def peakRSS():
+    """Return the peak resident set size of this process in bytes, or
+    C{None} if it cannot be found out."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss
+    # Everywhere else, ru_maxrss is in kilobytes.
+    return rss * 1024
+
+
+class _Stages(object):
+    """Records how long each stage takes."""
+
+    def __init__(self):
+        self.results = []
+
+    def time(self, name, f, *args, **kwargs):
+        start = time.time()
+        result = f(*args, **kwargs)
+        self.results.append({
+            'name': name,
+            'seconds': time.time() - start,
+            'peak_rss_bytes': peakRSS(),
+            })
+        return result
+
+
+def runBenchmark(shape, directory, jobs=1):
+    """Generate a package of the given L{PackageShape} in C{directory},
+    document it there and time each stage.
+
+    @return: The results, ready to be dumped as JSON.
+    """
+    stages = _Stages()
+    path = stages.time('generate', generatePackage, directory, shape)
+    output = os.path.join(directory, 'html')
+
+    options, _ = parse_args([
+        '--quiet', '--quiet', '--quiet',
+        '--docformat', shape.docformat,
+        '--jobs', str(jobs),
+        '--html-output', output,
+        ])
+    system = zopeinterface.ZopeInterfaceSystem(options)
+    system.projectname = 'synthetic'
+    stages.time('addPackage', system.addPackage, path, None)
+    stages.time('process', system.process)
+
+    writer = TemplateWriter(output)
+    writer.system = system
+    writer.prepOutputDirectory()
+    stages.time('writeModuleIndex', writer.writeModuleIndex, system)
+    stages.time('writeIndividualFiles', writer.writeIndividualFiles,
+                system.rootobjects)
+    inventory = SphinxInventoryWriter(
+        logger=system.msg, project_name=system.projectname)
+    stages.time('SphinxInventoryWriter.generate', inventory.generate,
+                subjects=system.rootobjects, basepath=output)
+
+    objects = len(system.allobjects)
+    for stage in stages.results:
+        if stage['seconds'] > 0:
+            stage['objects_per_second'] = objects / stage['seconds']
+        else:
+            stage['objects_per_second'] = None
+    return {
+        'pydoctor': __version__.short(),
+        'python': sys.version,
+        'shape': shape.asDict(),
+        'jobs': jobs,
+        'objects': objects,
+        'pages': len(os.listdir(output)),
+        'stages': stages.results,
+        'total_seconds': sum(s['seconds'] for s in stages.results),
+        'peak_rss_bytes': peakRSS(),
+        'stats': system.stats.asDict(),
+        }
+
+
+def getparser():
+    parser = optparse.OptionParser(
+        usage='python -m pydoctor.benchmarks [options]',
+        description=("Document a synthetic package and report how long "
+                     "each stage took as JSON."))
+    defaults = PackageShape()
+    parser.add_option(
+        '--modules', type=int, default=defaults.modules,
+        help="Number of modules in the package (default: %default).")
+    parser.add_option(
+        '--classes', type=int, default=defaults.classes,
+        help="Number of classes per module (default: %default).")
+    parser.add_option(
+        '--methods', type=int, default=defaults.methods,
+        help="Number of methods per class (default: %default).")
+    parser.add_option(
+        '--functions', type=int, default=defaults.functions,
+        help="Number of functions per module (default: %default).")
+    parser.add_option(
+        '--docstring-lines', dest='docstring_lines', type=int,
+        default=defaults.docstring_lines,
+        help=("Number of lines of prose per docstring, fields not "
+              "included (default: %default)."))
+    parser.add_option(
+        '--imports', type=int, default=defaults.imports,
+        help=("Number of other modules each module imports from "
+              "(default: %default)."))
+    parser.add_option(
+        '--docformat', default=defaults.docformat,
+        choices=['epytext', 'restructuredtext'],
+        help="Format of the docstrings (default: %default).")
+    parser.add_option(
+        '--seed', type=int, default=defaults.seed,
+        help="Seed for generating the package (default: %default).")
+    parser.add_option(
+        '-j', '--jobs', type=int, default=1,
+        help="Passed on to pydoctor (default: %default).")
+    parser.add_option(
+        '--directory', metavar='DIRECTORY',
+        help=("Generate the package and its documentation in DIRECTORY "
+              "and keep them, instead of using a temporary directory."))
+    parser.add_option(
+        '-o', '--output', metavar='FILE',
+        help="Write the results to FILE instead of standard output.")
+    return parser
+
+
+def main(args):
+    parser = getparser()
+    options, args = parser.parse_args(args)
+    if args:
+        parser.error("unexpected arguments: %s" % (' '.join(args),))
+    shape = PackageShape(
+        modules=options.modules, classes=options.classes,
+        methods=options.methods, functions=options.functions,
+        docstring_lines=options.docstring_lines, imports=options.imports,
+        docformat=options.docformat, seed=options.seed)
+    if options.directory:
+        directory = options.directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        results = runBenchmark(shape, directory, options.jobs)
+    else:
+        directory = tempfile.mkdtemp(prefix='pydoctor-benchmark-')
+        try:
+            results = runBenchmark(shape, directory, options.jobs)
+        finally:
+            shutil.rmtree(directory)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
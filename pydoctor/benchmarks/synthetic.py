@@ -0,0 +1,143 @@
+"""Generate synthetic packages to benchmark pydoctor with."""
+
+from __future__ import print_function
+
+import os
+import random
+
+# Filler for docstrings, so paragraphs wrap like real prose does.
+_WORDS = (
+    'the of and to in is that for it as with was on be by this are '
+    'from or an which have not at can but all were when there one '
+    'value result object instance method return given default number'
+    ).split()
+
+
+class PackageShape(object):
+    """The size and style of a synthetic package.
+
+    @ivar modules: The number of modules in the package.
+    @ivar classes: The number of classes in each module.
+    @ivar methods: The number of methods of each class.
+    @ivar functions: The number of module level functions in each module.
+    @ivar docstring_lines: The number of lines of prose in each docstring,
+        not counting fields.
+    @ivar imports: The number of other modules each module imports a class
+        from.  The first imported class is used as a base class.
+    @ivar docformat: C{'epytext'} or C{'restructuredtext'}.
+    @ivar seed: Seed for the random choices, so that the same shape always
+        gives the same package.
+    """
+
+    def __init__(self, modules=50, classes=5, methods=10, functions=5,
+                 docstring_lines=3, imports=3, docformat='epytext', seed=0):
+        self.modules = modules
+        self.classes = classes
+        self.methods = methods
+        self.functions = functions
+        self.docstring_lines = docstring_lines
+        self.imports = imports
+        self.docformat = docformat
+        self.seed = seed
+
+    def asDict(self):
+        return dict(vars(self))
+
+
+def _sentence(rnd, reference=None, docformat='epytext'):
+    words = [rnd.choice(_WORDS) for _ in range(rnd.randint(6, 12))]
+    if reference is not None:
+        if docformat == 'epytext':
+            words.append('L{%s}' % (reference,))
+        else:
+            words.append('`%s`' % (reference,))
+    words[0] = words[0].capitalize()
+    return ' '.join(words) + '.'
+
+
+def _docstring(rnd, shape, indent, references, params=(), returns=False,
+               ivars=()):
+    """Return the source of a docstring, indented by C{indent} spaces."""
+    lines = []
+    for i in range(shape.docstring_lines):
+        # Link to something in every other line.
+        reference = rnd.choice(references) if i % 2 and references else None
+        lines.append(_sentence(rnd, reference, shape.docformat))
+        if i == 0 and shape.docstring_lines > 1:
+            lines.append('')
+    if params or returns or ivars:
+        lines.append('')
+    for name in params:
+        if shape.docformat == 'epytext':
+            lines.append('@param %s: %s' % (name, _sentence(rnd)))
+            lines.append('@type %s: L{int}' % (name,))
+        else:
+            lines.append(':param %s: %s' % (name, _sentence(rnd)))
+            lines.append(':type %s: `int`' % (name,))
+    for name in ivars:
+        if shape.docformat == 'epytext':
+            lines.append('@ivar %s: %s' % (name, _sentence(rnd)))
+        else:
+            lines.append(':ivar %s: %s' % (name, _sentence(rnd)))
+    if returns:
+        if shape.docformat == 'epytext':
+            lines.append('@return: %s' % (_sentence(rnd),))
+        else:
+            lines.append(':return: %s' % (_sentence(rnd),))
+    pad = ' ' * indent
+    body = '\n'.join([pad + line if line else '' for line in lines])
+    return '%s"""\n%s\n%s"""\n' % (pad, body, pad)
+
+
+def _moduleSource(rnd, shape, index):
+    out = []
+    others = [i for i in range(shape.modules) if i != index]
+    imported = rnd.sample(others, min(shape.imports, len(others)))
+    references = []
+    for i in imported:
+        out.append('from synthetic.mod%d import Class%d_0\n' % (i, i))
+        references.append('Class%d_0' % (i,))
+    # Also link to things that cannot be resolved, which are the
+    # expensive case for the linker.
+    references.append('missing.Name%d' % (index,))
+    out.append('\n')
+    out.append(_docstring(rnd, shape, 0, references))
+    for c in range(shape.classes):
+        references.append('Class%d_%d' % (index, c))
+    for f in range(shape.functions):
+        out.append('\ndef function%d(a, b=None, *args, **kwargs):\n' % (f,))
+        out.append(_docstring(rnd, shape, 4, references,
+                              params=('a', 'b'), returns=True))
+        out.append('    return a\n')
+    for c in range(shape.classes):
+        if c == 0 or not imported:
+            base = 'object'
+        else:
+            base = 'Class%d_0' % (imported[0],)
+        out.append('\n\nclass Class%d_%d(%s):\n' % (index, c, base))
+        out.append(_docstring(rnd, shape, 4, references, ivars=('value',)))
+        out.append('\n    def __init__(self, value):\n')
+        out.append('        self.value = value\n')
+        for m in range(shape.methods - 1):
+            out.append('\n    def method%d(self, x, y=1):\n' % (m,))
+            out.append(_docstring(rnd, shape, 8, references,
+                                  params=('x', 'y'), returns=True))
+            out.append('        return self.value\n')
+    return ''.join(out)
+
+
+def generatePackage(directory, shape):
+    """Write a package called C{synthetic} with the given L{PackageShape}
+    into C{directory}.
+
+    @return: The path of the package.
+    """
+    rnd = random.Random(shape.seed)
+    path = os.path.join(directory, 'synthetic')
+    os.makedirs(path)
+    with open(os.path.join(path, '__init__.py'), 'w') as f:
+        f.write(_docstring(rnd, shape, 0, []))
+    for index in range(shape.modules):
+        with open(os.path.join(path, 'mod%d.py' % (index,)), 'w') as f:
+            f.write(_moduleSource(rnd, shape, index))
+    return path
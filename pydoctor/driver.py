@@ -6,9 +6,10 @@ import datetime
 import os
 import sys
 
-from pydoctor import model, zopeinterface
+from pydoctor import astbuilder, epydoc2stan, model, snapshot, zopeinterface
 from pydoctor.sphinx import (MAX_AGE_HELP, USER_INTERSPHINX_CACHE,
                              SphinxInventoryWriter, prepareCache)
+from pydoctor.stats import SPANS, Stats
 
 BUILDTIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
@@ -76,6 +77,19 @@ def getparser():
         '--add-module', action='append', dest='modules',
         metavar='MODULE', default=[],
         help=("Add a module to the system.  Can be repeated."))
+    parser.add_option(
+        '--save-model', dest='savemodel', metavar='FILE',
+        help=("Save the processed model of the code to FILE, to generate "
+              "the documentation from later with --load-model.  Unless "
+              "--make-html or --make-intersphinx is given too, nothing "
+              "else is written."))
+    parser.add_option(
+        '--load-model', dest='loadmodel', metavar='FILE',
+        help=("Generate the documentation from the model saved to FILE "
+              "with --save-model, instead of adding and processing "
+              "packages and modules.  The system class, docformat and "
+              "privacy rules of the saved model are used; --privacy "
+              "rules given now are added to them."))
     parser.add_option(
         '--prepend-package', action='store', dest='prependedpackage',
         help=("Pretend that all packages are within this one.  "
@@ -89,14 +103,37 @@ def getparser():
               "conflicts with abbreviation where you have two or more "
               "modules that start with the same letter.  Example: "
               "twistedcaldav=tcd."))
+    parser.add_option(
+        '--privacy', action='append', dest='privacy',
+        metavar='PRIVACY:PATTERN', default=[],
+        help=("Set the privacy of the objects whose fully qualified name "
+              "matches PATTERN to PRIVACY, one of HIDDEN, PRIVATE or "
+              "VISIBLE.  In PATTERN, * matches any characters, dots "
+              "included, and ? matches one.  Can be repeated; the last "
+              "rule that matches an object wins.  Everything in a hidden "
+              "object is hidden."))
     parser.add_option(
         '--docformat', dest='docformat', action='store', default='epytext',
         help=("Which epydoc-supported format docstrings are assumed "
               "to be in."))
+    parser.add_option(
+        '--skim-function-bodies', dest='skimfunctionbodies',
+        action='store_true', default=False,
+        help=("Only look into the bodies of methods, and there only for "
+              "the attributes assigned to self.  This makes processing "
+              "code with big functions faster, but the functions and "
+              "classes defined inside functions are not documented."))
     parser.add_option(
         '--html-subject', dest='htmlsubjects', action='append',
         help=("The fullName of object to generate API docs for"
               " (default: everything)."))
+    parser.add_option(
+        '--lazy', dest='lazy', action='store_true', default=False,
+        help=("With --html-subject, only process the modules the subjects "
+              "are in and the modules these import, directly or not.  "
+              "This is much faster for large projects, but the pages do "
+              "not know about subclasses and other things defined in the "
+              "rest of the code."))
     parser.add_option(
         '--html-summary-pages', dest='htmlsummarypages',
         action='store_true', default=False,
@@ -111,6 +148,23 @@ def getparser():
     parser.add_option(
         '--html-output', dest='htmloutput', default='apidocs',
         help=("Directory to save HTML files to (default 'apidocs')"))
+    parser.add_option(
+        '--html-incremental', dest='htmlincremental',
+        default=False, action='store_true',
+        help=("Only rewrite the pages whose contents changed since the "
+              "last incremental run into the same output directory.  "
+              "Pages that are kept show the build time of the run that "
+              "wrote them."))
+    parser.add_option(
+        '--jobs', '-j', dest='jobs', type=int, default=1, metavar='N',
+        help=("Parse modules and render pages in N worker processes "
+              "(default 1).  Workers are forked, so this has no effect "
+              "where fork() is not available."))
+    parser.add_option(
+        '--template-dir', dest='templatedir', metavar='DIRECTORY',
+        help=("Use the templates and static files in DIRECTORY instead "
+              "of the ones pydoctor comes with.  Files that are not in "
+              "DIRECTORY are taken from pydoctor."))
     parser.add_option(
         '--html-writer', dest='htmlwriter',
         help=("Dotted name of html writer class to use (default "
@@ -143,6 +197,30 @@ def getparser():
         '--introspect-c-modules', default=False, action='store_true',
         help=("Import and introspect any C modules found."))
 
+    parser.add_option(
+        '--cache-dir', dest='cachedir', metavar='DIRECTORY',
+        help=("Cache parsed modules in this directory, so that modules "
+              "which have not changed since the last run do not need "
+              "to be parsed again."))
+
+    parser.add_option(
+        '--stdlib-modules', dest='stdlibmodules', metavar='FILE',
+        help=("Read the names of the standard library modules, one per "
+              "line, from FILE instead of searching the library of the "
+              "running Python.  Use this to link to the standard library "
+              "of another Python version."))
+
+    parser.add_option(
+        '--stats-json', dest='statsjson', metavar='FILE',
+        help=("Write how long each stage took and counts of what it "
+              "did to FILE, as JSON."))
+    parser.add_option(
+        '--profile-stage', dest='profilestages', metavar='STAGE',
+        action='append', type='choice', choices=SPANS, default=[],
+        help=("Profile STAGE, one of %s, and write the profile to "
+              "STAGE.prof next to the --stats-json file or in the "
+              "current directory.  Can be repeated." % (', '.join(SPANS),)))
+
     parser.add_option(
         '--intersphinx', action='append', dest='intersphinx',
         metavar='URL_TO_OBJECTS.INV', default=[],
@@ -225,6 +303,13 @@ def main(args):
                          cachePath=options.intersphinx_cache_path,
                          maxAge=options.intersphinx_cache_max_age)
 
+    saved = None
+    if options.loadmodel:
+        try:
+            saved = snapshot.load(options.loadmodel)
+        except (IOError, OSError, ValueError) as e:
+            error(str(e))
+
     try:
         # step 1: make/find the system
         if options.systemclass:
@@ -233,24 +318,46 @@ def main(args):
             if not issubclass(systemclass, model.System):
                 msg = "%s is not a subclass of model.System"
                 error(msg, systemclass)
+        elif saved is not None:
+            systemclass = findClassFromDottedName(saved['system'],
+                                                  '--load-model')
         else:
             systemclass = zopeinterface.ZopeInterfaceSystem
 
         system = systemclass(options)
+        system.stats = Stats(options.profilestages)
         system.fetchIntersphinxInventories(cache)
 
         system.sourcebase = options.htmlsourcebase
 
+        if options.cachedir:
+            system.astcache = astbuilder.ASTCache(options.cachedir)
+
+        if options.stdlibmodules:
+            system.stdlib_modules = epydoc2stan.read_stdlib_modules(
+                options.stdlibmodules)
+        elif options.cachedir:
+            system.stdlib_modules = epydoc2stan.cached_stdlib_modules(
+                options.cachedir)
+
         if options.abbrevmapping:
             for thing in options.abbrevmapping.split(','):
                 k, v = thing.split('=')
                 system.abbrevmapping[k] = v
 
+        privacy_rules = []
+        for rule in options.privacy:
+            try:
+                privacy_rules.append(model.parsePrivacyRule(rule))
+            except ValueError as e:
+                error(str(e))
+
         # step 1.5: check that we're actually going to accomplish something here
         args = list(args) + options.modules + options.packages
 
         if options.makehtml == MAKE_HTML_DEFAULT:
-            if not options.testing and not options.makeintersphinx:
+            if not (options.testing or options.makeintersphinx or
+                    options.savemodel):
                 options.makehtml = True
             else:
                 options.makehtml = False
@@ -274,26 +381,33 @@ def main(args):
 
         # step 2: add any packages and modules
 
-        if args:
-            prependedpackage = None
-            if options.prependedpackage:
-                for m in options.prependedpackage.split('.'):
-                    prependedpackage = system.Package(
-                        system, m, None, prependedpackage)
-                    system.addObject(prependedpackage)
-                    initmodule = system.Module(system, '__init__', None, prependedpackage)
-                    system.addObject(initmodule)
-            for path in args:
-                path = os.path.abspath(path)
-                if path in system.packages:
-                    continue
-                if os.path.isdir(path):
-                    system.msg('addPackage', 'adding directory ' + path)
-                    system.addPackage(path, prependedpackage)
-                else:
-                    system.msg('addModuleFromPath', 'adding module ' + path)
-                    system.addModuleFromPath(prependedpackage, path)
-                system.packages.append(path)
+        if saved is not None:
+            if args:
+                error("--load-model cannot be combined with packages or "
+                      "modules to add")
+            system.msg('snapshot', 'loading model from ' + options.loadmodel)
+            snapshot.restoreSystem(system, saved)
+        elif args:
+            with system.stats.span('discovery'):
+                prependedpackage = None
+                if options.prependedpackage:
+                    for m in options.prependedpackage.split('.'):
+                        prependedpackage = system.Package(
+                            system, m, None, prependedpackage)
+                        system.addObject(prependedpackage)
+                        initmodule = system.Module(system, '__init__', None, prependedpackage)
+                        system.addObject(initmodule)
+                for path in args:
+                    path = os.path.abspath(path)
+                    if path in system.packages:
+                        continue
+                    if os.path.isdir(path):
+                        system.msg('addPackage', 'adding directory ' + path)
+                        system.addPackage(path, prependedpackage)
+                    else:
+                        system.msg('addModuleFromPath', 'adding module ' + path)
+                        system.addModuleFromPath(prependedpackage, path)
+                    system.packages.append(path)
 
         # step 3: move the system to the desired state
 
@@ -301,7 +415,23 @@ def main(args):
             error("The system does not contain any code, did you "
                   "forget an --add-package?")
 
-        system.process()
+        # The privacy rules of a loaded model replace the ones the system
+        # started with, so the ones given now are only added after loading.
+        for privacy, pattern in privacy_rules:
+            system.addPrivacyRule(privacy, pattern)
+
+        if saved is None:
+            if options.lazy and options.htmlsubjects:
+                modules = []
+                for fn in options.htmlsubjects:
+                    modules.extend(system.subjectModules(fn))
+                system.process(modules)
+            else:
+                system.process()
+
+        if options.savemodel:
+            system.msg('snapshot', 'saving model to ' + options.savemodel)
+            snapshot.save(system, options.savemodel)
 
         if system.options.projectname is None:
             name = '/'.join([ro.name for ro in system.rootobjects])
@@ -367,6 +497,13 @@ def main(args):
                 subjects=subjects,
                 basepath=options.htmloutput,
                 )
+
+        if options.statsjson:
+            system.stats.save(options.statsjson)
+        if options.profilestages:
+            directory = os.path.dirname(options.statsjson or '') or os.curdir
+            for path in system.stats.saveProfiles(directory):
+                system.msg('stats', 'wrote profile to %s' % (path,))
     except:
         if options.pdb:
             import pdb
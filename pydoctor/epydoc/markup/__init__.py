@@ -91,6 +91,17 @@ class ParsedDocstring:
         """
         raise NotImplementedError()
 
+    def get_summary(self):
+        """
+        Return the first block of this docstring, usually its first
+        paragraph, which is shown as the summary of the docstring.
+
+        The default implementation returns the whole docstring.
+
+        @rtype: L{ParsedDocstring}
+        """
+        return self
+
     def to_stan(self, docstring_linker):
         """
         Translate this docstring to a Stan tree.
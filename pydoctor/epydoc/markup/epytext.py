@@ -1272,6 +1272,12 @@ class ParsedEpytextDocstring(ParsedDocstring):
     def __str__(self):
         return str(self._tree)
 
+    def get_summary(self):
+        if self._tree is None or not self._tree.children:
+            return self
+        return ParsedEpytextDocstring(Element(
+            self._tree.tag, self._tree.children[0], **self._tree.attribs))
+
     def to_stan(self, docstring_linker):
         if self._stan is not None:
             return self._stan
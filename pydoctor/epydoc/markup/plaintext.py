@@ -36,5 +36,10 @@ class ParsedPlaintextDocstring(ParsedDocstring):
     def split_fields(self, errors=None):
         return self, []
 
+    def get_summary(self):
+        # The first paragraph, on one line.
+        lines = self._text.strip().split('\n\n', 1)[0].split('\n')
+        return ParsedPlaintextDocstring(' '.join(l.strip() for l in lines))
+
     def to_stan(self, docstring_linker):
         return tags.pre(class_='literalblock')('\n', self._text, '\n')
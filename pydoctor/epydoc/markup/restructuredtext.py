@@ -154,6 +154,14 @@ class ParsedRstDocstring(ParsedDocstring):
         else:
             return None, visitor.fields
 
+    def get_summary(self):
+        # Inherit docs
+        if not self._document.children:
+            return self
+        summary = self._document.copy()
+        summary.append(self._document.children[0].deepcopy())
+        return ParsedRstDocstring(summary)
+
     def to_stan(self, docstring_linker):
         # Inherit docs
         visitor = _EpydocHTMLTranslator(self._document, docstring_linker)
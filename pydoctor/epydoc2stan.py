@@ -4,14 +4,15 @@ Convert epydoc markup into renderable content.
 
 from __future__ import print_function
 
-import astor
-
+import hashlib
 import inspect
 import itertools
 import os
 import sys
+import tempfile
 
 from pydoctor import model
+from pydoctor.astutils import node2source
 from six.moves import builtins
 from six.moves.urllib.parse import quote
 from twisted.web.template import tags
@@ -61,17 +62,98 @@ def boringDocstring(doc, summary=False):
     return (tags.tt if summary else tags.pre)(doc)
 
 
-def stdlib_doc_link_for_name(name):
+try:
+    from importlib.machinery import EXTENSION_SUFFIXES
+except ImportError:
+    EXTENSION_SUFFIXES = ['.so']
+
+
+def find_stdlib_modules(stdlib_dir=STDLIB_DIR):
+    """Find the names of all modules and packages in the standard library
+    of the running Python, which is installed in C{stdlib_dir}.
+
+    @rtype: C{frozenset}
+    """
+    names = set(sys.builtin_module_names)
+    names.update(getattr(sys, 'stdlib_module_names', ()))
+    names.add('os.path')
+    for dirpath, dirnames, filenames in os.walk(stdlib_dir):
+        prefix = os.path.relpath(dirpath, stdlib_dir)
+        if prefix == os.curdir:
+            prefix = ''
+        else:
+            prefix = prefix.replace(os.sep, '.') + '.'
+        # This also skips site-packages and lib-dynload.
+        dirnames[:] = [d for d in dirnames if _isidentifier(d)]
+        for d in dirnames:
+            if os.path.exists(os.path.join(dirpath, d, '__init__.py')):
+                names.add(prefix + d)
+        for f in filenames:
+            if f.endswith('.py') and _isidentifier(f[:-3]):
+                names.add(prefix + f[:-3])
+    dynload = os.path.join(stdlib_dir, 'lib-dynload')
+    if os.path.isdir(dynload):
+        for f in os.listdir(dynload):
+            for suffix in EXTENSION_SUFFIXES:
+                if f.endswith(suffix):
+                    names.add(f[:-len(suffix)])
+                    break
+    return frozenset(names)
+
+def _isidentifier(name):
+    return name.replace('_', 'a').isalnum() and not name[0].isdigit()
+
+
+def read_stdlib_modules(path):
+    """Read the standard library module names listed, one per line, in the
+    file at C{path}.
+
+    @rtype: C{frozenset}
+    """
+    with open(path) as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+def cached_stdlib_modules(directory):
+    """Like L{find_stdlib_modules}, but keep the result in C{directory} so
+    later runs with the same Python do not need to search its library.
+    """
+    key = hashlib.sha1(
+        ('%s\n%s' % (STDLIB_DIR, sys.version)).encode('utf-8')).hexdigest()
+    path = os.path.join(directory, 'stdlib-%s.txt' % (key,))
+    try:
+        return read_stdlib_modules(path)
+    except (IOError, OSError):
+        pass
+    names = find_stdlib_modules()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        for name in sorted(names):
+            f.write(name + '\n')
+    os.rename(tmp, path)
+    return names
+
+
+_stdlib_modules = None
+
+def stdlib_doc_link_for_name(name, stdlib_modules=None):
+    """Return a link to the standard library documentation for C{name}, if
+    it names a standard library module or something in one, or a builtin.
+
+    @param stdlib_modules: The names of the standard library modules.  By
+        default, those of the running Python, see L{find_stdlib_modules}.
+    """
+    if stdlib_modules is None:
+        global _stdlib_modules
+        if _stdlib_modules is None:
+            _stdlib_modules = find_stdlib_modules()
+        stdlib_modules = _stdlib_modules
     parts = name.split('.')
     for i in range(len(parts), 0, -1):
-        sub_parts = parts[:i]
-        filename = '/'.join(sub_parts)
-        sub_name = '.'.join(sub_parts)
-        if sub_name == 'os.path' \
-               or os.path.exists(os.path.join(STDLIB_DIR, filename) + '.py') \
-               or os.path.exists(os.path.join(STDLIB_DIR, filename, '__init__.py')) \
-               or os.path.exists(os.path.join(STDLIB_DIR, 'lib-dynload', filename) + '.so') \
-               or sub_name in sys.builtin_module_names:
+        sub_name = '.'.join(parts[:i])
+        if sub_name in stdlib_modules:
             return STDLIB_URL + sub_name + '.html#' + name
     part0 = parts[0]
     if part0 in builtins.__dict__ and not part0.startswith('__'):
@@ -92,20 +174,19 @@ class _EpydocLinker(DocstringLinker):
     def __init__(self, obj):
         self.obj = obj
 
-    def _objLink(self, obj, prettyID):
+    def _objHref(self, obj):
         if obj.documentation_location is model.DocLocation.PARENT_PAGE:
             p = obj.parent
             if isinstance(p, model.Module) and p.name == '__init__':
                 p = p.parent
-            linktext = link(p) + '#' + quote(obj.name)
+            return link(p) + '#' + quote(obj.name)
         elif obj.documentation_location is model.DocLocation.OWN_PAGE:
-            linktext = link(obj)
+            return link(obj)
         else:
             raise AssertionError(
                 "Unknown documentation_location: %s" % obj.documentation_location)
-        return tags.a(tags.code(prettyID), href=linktext)
 
-    def look_for_name(self, name, candidates):
+    def look_for_name(self, name, candidates, problems):
         part0 = name.split('.')[0]
         potential_targets = []
         for src in candidates:
@@ -117,11 +198,8 @@ class _EpydocLinker(DocstringLinker):
         if len(potential_targets) == 1:
             return potential_targets[0]
         elif len(potential_targets) > 1:
-            self.obj.system.msg(
-                "translate_identifier_xref", "%s:%s ambiguous ref to %s, could be %s" % (
-                    self.obj.fullName(), self.obj.linenumber, name,
-            ', '.join([ob.fullName() for ob in potential_targets])),
-                thresh=-1)
+            problems.append("ambiguous ref to %s, could be %s" % (
+                name, ', '.join([ob.fullName() for ob in potential_targets])))
         return None
 
     def look_for_intersphinx(self, name):
@@ -133,6 +211,20 @@ class _EpydocLinker(DocstringLinker):
         return self.obj.system.intersphinx.getLink(name)
 
     def translate_identifier_xref(self, fullID, prettyID):
+        """Return a link to what ``L{fullID}`` refers to, or just the pretty
+        text if it cannot be resolved.
+
+        The reference is reported to the system's C{xrefobserver}, if any.
+        """
+        href = self.resolve_identifier_xref(fullID)
+        observer = self.obj.system.xrefobserver
+        if observer is not None:
+            observer(self.obj, fullID, href)
+        if href is None:
+            return tags.code(prettyID)
+        return tags.a(tags.code(prettyID), href=href)
+
+    def resolve_identifier_xref(self, fullID):
         """Figure out what ``L{fullID}`` should link to.
 
         There is a lot of DWIM here.  The order goes:
@@ -157,31 +249,74 @@ class _EpydocLinker(DocstringLinker):
              names an object in each one.  Again, if more than one object is
              found, complain.
 
+        The outcome only depends on the scope in which names are looked up
+        and is cached per scope and identifier, so the system's
+        C{resolved_xrefs} is shared by all pages.  Problems are reported
+        every time, though.
+
+        @return: The URL to link to, or C{None} if the reference could not be
+            resolved.
         """
-        src = self.obj
+        obj = self.obj
+        scope = obj
+        if (isinstance(obj, (model.Function, model.Attribute))
+                and not obj.contents and obj.parent is not None):
+            # These look up names in their parent, and have no children
+            # for the uncle walk to look at.
+            scope = obj.parent
+        cache = obj.system.resolved_xrefs
+        key = (scope, fullID)
+        resolution = cache.get(key)
+        if resolution is None:
+            problems = []
+            with obj.system.stats.span('links'):
+                href = self._resolve(scope, fullID, problems)
+            resolution = cache[key] = (href, tuple(problems))
+        href, problems = resolution
+        if href is None:
+            obj.system.stats.count('links failed')
+        else:
+            obj.system.stats.count('links resolved')
+        for problem in problems:
+            self._warn("%s:%s %s" % (obj.fullName(), obj.linenumber, problem))
+        return href
+
+    def _resolve(self, scope, fullID, problems):
+        src = scope
         while src is not None:
             target = src.resolveName(fullID)
             if target is not None:
-                return self._objLink(target, prettyID)
+                return self._objHref(target)
             src = src.parent
-        target = self.obj.system.objForFullName(fullID)
+        target = scope.system.objForFullName(fullID)
         if target is not None:
-            return self._objLink(target, prettyID)
-        fullerID = self.obj.expandName(fullID)
-        linktext = stdlib_doc_link_for_name(fullerID)
+            return self._objHref(target)
+        fullerID = scope.expandName(fullID)
+        linktext = stdlib_doc_link_for_name(
+            fullerID, scope.system.stdlib_modules)
         if linktext is not None:
-            return tags.a(tags.code(prettyID), href=linktext)
-        src = self.obj
+            return linktext
+        # Only objects that define the first part of fullID can be the
+        # source of a match in the next two steps.
+        defining = scope.system.objectsDefining(fullID.split('.')[0])
+        src = scope
         while src is not None:
-            target = self.look_for_name(fullID, src.contents.values())
+            candidates = [o for o in defining
+                          if src.contents.get(o.name) is o]
+            if len(candidates) > 1:
+                # Complain about an ambiguity in the order of src.contents.
+                candidates = src.contents.values()
+            target = self.look_for_name(fullID, candidates, problems)
             if target is not None:
-                return self._objLink(target, prettyID)
+                return self._objHref(target)
             src = src.parent
-        target = self.look_for_name(fullID, itertools.chain(
-            self.obj.system.objectsOfType(model.Module),
-            self.obj.system.objectsOfType(model.Package)))
+        # Modules first, then packages.
+        candidates = sorted(
+            [o for o in defining if isinstance(o, (model.Module, model.Package))],
+            key=lambda o: isinstance(o, model.Package))
+        target = self.look_for_name(fullID, candidates, problems)
         if target is not None:
-            return self._objLink(target, prettyID)
+            return self._objHref(target)
 
         target = self.look_for_intersphinx(fullerID)
         if not target:
@@ -190,14 +325,14 @@ class _EpydocLinker(DocstringLinker):
             # try our luck with fullID.
             target = self.look_for_intersphinx(fullID)
         if target:
-            return tags.a(tags.code(prettyID), href=target)
+            return target
         if fullID != fullerID:
-            self.obj.system.msg(
-                "translate_identifier_xref", "%s:%s invalid ref to '%s' "
-                "resolved as '%s'" % (
-                    self.obj.fullName(), self.obj.linenumber, fullID, fullerID),
-                thresh=-1)
-        return tags.code(prettyID)
+            problems.append("invalid ref to '%s' resolved as '%s'" % (
+                    fullID, fullerID))
+        return None
+
+    def _warn(self, msg):
+        self.obj.system.msg("translate_identifier_xref", msg, thresh=-1)
 
 
 class FieldDesc(object):
@@ -444,6 +579,77 @@ def reportErrors(obj, errs):
             p(err)
 
 
+class _ParsedDocstring(object):
+    """A docstring of some object, parsed and split into its fields.
+
+    @ivar body: The docstring without its fields, or C{None} if that is
+        empty or parsing failed.
+    @ivar fields: The L{Field}s of the docstring.
+    @ivar errors: The errors reported while parsing the docstring.
+    """
+
+    def __init__(self, body, fields, errors):
+        self.body = body
+        self.fields = fields
+        self.errors = errors
+
+
+def get_parsed_docstring(obj, doc):
+    """Parse C{doc}, a docstring of C{obj}, in the system's docformat.
+
+    Parsing is done only once per object and docstring: the summary row,
+    the full docstring and L{extract_fields} all share the result, until
+    L{release_parsed_docstring} is called once the full docstring has been
+    rendered.
+
+    @return: A L{_ParsedDocstring}, or C{None} if there is no parser for
+        the docformat.
+    """
+    docformat = obj.system.options.docformat
+    key = (obj, docformat, doc)
+    cache = obj.system.parsed_docstrings
+    parsed = cache.get(key)
+    if parsed is None:
+        parse_docstring = get_parser(docformat)[0]
+        if not parse_docstring:
+            return None
+        stats = obj.system.stats
+        stats.count('docstrings parsed')
+        with stats.span('docstrings'):
+            errs = []
+            try:
+                pdoc = parse_docstring(doc, errs)
+            except Exception as e:
+                errs = [e.__class__.__name__ +': ' + str(e)]
+                pdoc = None
+            fields = []
+            if pdoc is not None:
+                pdoc, fields = pdoc.split_fields()
+        parsed = cache[key] = _ParsedDocstring(pdoc, fields, errs)
+    return parsed
+
+
+def release_parsed_docstring(obj, doc):
+    """Forget the parse of C{doc} kept by L{get_parsed_docstring}."""
+    key = (obj, obj.system.options.docformat, doc)
+    obj.system.parsed_docstrings.pop(key, None)
+
+
+def _parse_summary(source, doc):
+    """Parse C{doc}, the summary text of a docstring of C{source} that
+    could not be parsed as a whole, on its own.
+    """
+    errs = []
+    try:
+        pdoc = get_parser(source.system.options.docformat)[0](doc, errs)
+    except Exception as e:
+        errs = [e.__class__.__name__ +': ' + str(e)]
+        pdoc = None
+    if pdoc is not None:
+        pdoc = pdoc.split_fields()[0]
+    return _ParsedDocstring(pdoc, [], errs)
+
+
 def doc2stan(obj, summary=False):
     """Generate an HTML representation of a docstring"""
     if getattr(obj, 'parsed_docstring', None) is not None:
@@ -481,26 +687,33 @@ def doc2stan(obj, summary=False):
         lines = [ line.strip() for line in lines ]
         if len(lines) > 3:
             return tags.span(class_="undocumented")('No summary')
-        else:
-            doc = ' '.join(lines)
     parse_docstring, e = get_parser(obj.system.options.docformat)
     if not parse_docstring:
         msg = 'Error trying to import %r parser:\n\n    %s: %s\n\nUsing plain text formatting only.'%(
             obj.system.options.docformat, e.__class__.__name__, e)
         obj.system.msg('epydoc2stan', msg, thresh=-1, once=True)
+        return boringDocstring(' '.join(lines) if summary else doc, summary)
+    parsed = get_parsed_docstring(source, doc)
+    if summary:
+        # The summary is the first paragraph of the docstring, so reuse the
+        # parse of the whole docstring; only when that failed is the
+        # summary parsed on its own, since it may well be fine.
+        doc = ' '.join(lines)
+        if parsed.errors:
+            parsed = _parse_summary(source, doc)
+        body = parsed.body
+        if body is not None:
+            body = body.get_summary()
+    else:
+        release_parsed_docstring(source, doc)
+        body = parsed.body
+    if parsed.errors:
+        reportErrors(source, parsed.errors)
         return boringDocstring(doc, summary)
-    errs = []
-    try:
-        pdoc = parse_docstring(doc, errs)
-    except Exception as e:
-        errs = [e.__class__.__name__ +': ' + str(e)]
-    if errs:
-        reportErrors(source, errs)
-        return boringDocstring(doc, summary)
-    pdoc, fields = pdoc.split_fields()
-    if pdoc is not None:
+    fields = parsed.fields
+    if body is not None:
         try:
-            stan = pdoc.to_stan(_EpydocLinker(source))
+            stan = body.to_stan(_EpydocLinker(source))
         except Exception as e:
             reportErrors(source, [e.__class__.__name__ +': ' + str(e)])
             return boringDocstring(doc, summary)
@@ -508,7 +721,7 @@ def doc2stan(obj, summary=False):
     else:
         content = []
     if summary:
-        if content and content[0].tagName == 'p':
+        if content and getattr(content[0], 'tagName', None) == 'p':
             content = content[0].children
         s = tags.span(*content)
     else:
@@ -536,7 +749,7 @@ def get_parsed_type(obj):
 
     annotation = getattr(obj, 'annotation', None)
     if annotation is not None:
-        src = astor.to_source(annotation).strip()
+        src = node2source(annotation)
         return ParsedEpytextDocstring(
             Element('epytext',
                 Element('para',
@@ -560,15 +773,10 @@ def extract_fields(obj):
     doc, source = get_docstring(obj)
     if doc is None:
         return
-    parse_docstring, e = get_parser(obj.system.options.docformat)
-    if not parse_docstring:
+    parsed = get_parsed_docstring(source, doc)
+    if parsed is None:
         return
-    try:
-        pdoc = parse_docstring(doc, [])
-    except Exception:
-        return
-    pdoc, fields = pdoc.split_fields()
-    for field in fields:
+    for field in parsed.fields:
         tag = field.tag()
         if tag in ['ivar', 'cvar', 'var', 'type']:
             arg = field.arg()
@@ -9,14 +9,17 @@ being documented -- a System is a bad of Documentables, in some sense.
 from __future__ import print_function, unicode_literals
 
 import datetime
+import heapq
 import imp
 import os
 import posixpath
+import re
 import sys
 import types
 from enum import Enum
 
 from pydoctor.sphinx import SphinxInventory
+from pydoctor.stats import Stats
 from six.moves import builtins
 
 # originally when I started to write pydoctor I had this idea of a big
@@ -55,7 +58,11 @@ class Documentable(object):
     @ivar kind: ...
     """
     documentation_location = DocLocation.OWN_PAGE
-    sourceHref = None
+
+    # Subclasses for the kinds of object that are most numerous declare
+    # __slots__ too, so their instances do without a __dict__.
+    __slots__ = ('system', 'name', 'docstring', 'parent', 'parentMod',
+                 'sourceHref', '_fullName')
 
     @property
     def css_class(self):
@@ -71,26 +78,47 @@ class Documentable(object):
         self.docstring = docstring
         self.parent = parent
         self.parentMod = None
+        self.sourceHref = None
+        self._fullName = None
         self.setup()
-        if not isinstance(self, Package):
-            self.doctarget = self
 
     def setup(self):
         self.contents = {}
         self.orderedcontents = []
 
+    def _addChild(self, obj):
+        if self.contents is _NO_CONTENTS:
+            self.contents = {}
+            self.orderedcontents = []
+        self.contents[obj.name] = obj
+        self.orderedcontents.append(obj)
+
+    @property
+    def doctarget(self):
+        return self
+
     def fullName(self):
-        parent = self.parent
-        if parent is not None:
-            if (parent.parent and isinstance(parent.parent, Package)
-                and isinstance(parent, Module)
-                and parent.name == '__init__'):
-                prefix = parent.parent.fullName() + '.'
+        fullName = self._fullName
+        if fullName is None:
+            parent = self.parent
+            if parent is not None:
+                if (parent.parent and isinstance(parent.parent, Package)
+                    and isinstance(parent, Module)
+                    and parent.name == '__init__'):
+                    prefix = parent.parent.fullName() + '.'
+                else:
+                    prefix = parent.fullName() + '.'
             else:
-                prefix = parent.fullName() + '.'
-        else:
-            prefix = ''
-        return prefix + self.name
+                prefix = ''
+            fullName = self._fullName = prefix + self.name
+        return fullName
+
+    def _invalidateFullName(self):
+        # Must be called whenever the name or parent of this object changes,
+        # as the full names of all objects below it change with it.
+        self._fullName = None
+        for o in self.orderedcontents:
+            o._invalidateFullName()
 
     def __repr__(self):
         return "%s %r"%(self.__class__.__name__, self.fullName())
@@ -111,16 +139,20 @@ class Documentable(object):
         # and that are of course not written down anywhere
         # :/
         self._handle_reparenting_pre()
+        self.system._objectsDefining = None
+        self.system._privacyClasses = None
+        self.system._classHierarchy = None
+        self.system.resolved_xrefs.clear()
         old_parent = self.parent
         old_name = self.name
         self.parent = self.parentMod = new_parent
         self.name = new_name
+        self._invalidateFullName()
         self._handle_reparenting_post()
         del old_parent.contents[old_name]
         old_parent.orderedcontents.remove(self)
         old_parent._localNameToFullName_map[old_name] = self.fullName()
-        new_parent.contents[new_name] = self
-        new_parent.orderedcontents.append(self)
+        new_parent._addChild(self)
         self._handle_reparenting_post()
 
     def _handle_reparenting_pre(self):
@@ -178,7 +210,7 @@ class Documentable(object):
 
         @rtype: a member of the L{PrivacyClass} class/enum.
         """
-        return self.system.privacyClass(self)
+        return self.system.privacyClassOf(self)
 
     @property
     def isVisible(self):
@@ -240,21 +272,91 @@ class Module(CanContainImportsDocumentable):
             return name
 
 
+def _mergeMros(sequences):
+    """Merge C{sequences} the way C3 linearization does, see
+    U{https://www.python.org/download/releases/2.3/mro/}.
+
+    @return: The merged list, or C{None} if the sequences cannot be merged
+        consistently.
+    """
+    sequences = [list(s) for s in sequences if s]
+    result = []
+    while sequences:
+        for seq in sequences:
+            head = seq[0]
+            if not any(head in s[1:] for s in sequences):
+                break
+        else:
+            return None
+        result.append(head)
+        for s in sequences:
+            if s[0] is head:
+                del s[0]
+        sequences = [s for s in sequences if s]
+    return result
+
+
 class Class(CanContainImportsDocumentable):
     kind = "Class"
     def setup(self):
         super(Class, self).setup()
         self.rawbases = []
         self.subclasses = []
+        self._baseobjects = []
+        self._mro = None
+
+    @property
+    def baseobjects(self):
+        """The L{Class} of each base class, or C{None} for the ones that
+        are not part of the system."""
+        return self._baseobjects
+
+    @baseobjects.setter
+    def baseobjects(self, baseobjects):
+        self._baseobjects = baseobjects
+        self._invalidateMro()
+
+    def _invalidateMro(self):
+        # A subclass can only have worked out its MRO after its bases did,
+        # so there is nothing to do below a class that has none.
+        if self._mro is not None:
+            self._mro = None
+            for sc in self.subclasses:
+                sc._invalidateMro()
+
+    @property
+    def mro(self):
+        """This class followed by its base classes that are part of the
+        system, in method resolution order.
+
+        The order is computed with C3 linearization like Python does, and
+        remembered until the bases of this class or of one of its bases
+        change.  Bases that are not part of the system are left out.  If
+        the bases cannot be linearized, for example because some are
+        missing, the order falls back to a depth first walk of the bases
+        that skips the ones seen before.
+        """
+        mro = self._mro
+        if mro is None:
+            bases = [b for b in self.baseobjects if b is not None]
+            merged = _mergeMros([b.mro for b in bases] + [bases])
+            if merged is None:
+                merged = []
+                seen = set()
+                for b in bases:
+                    for b2 in b.mro:
+                        if b2 not in seen:
+                            seen.add(b2)
+                            merged.append(b2)
+            mro = self._mro = [self] + merged
+        return mro
 
     def allbases(self, include_self=False):
+        """Return the base classes of this class in method resolution
+        order, see L{mro}."""
         if include_self:
-            yield self
-        for b in self.baseobjects:
-            if b is None:
-                continue
-            for b2 in b.allbases(True):
-                yield b2
+            return self.mro
+        return self.mro[1:]
     def _localNameToFullName(self, name):
         if name in self.contents:
             o = self.contents[name]
@@ -265,14 +367,32 @@ class Class(CanContainImportsDocumentable):
             return self.parent._localNameToFullName(name)
 
 
+class _NoContents(dict):
+    """The contents of an object that has no children yet."""
+
+    def __setitem__(self, key, value):
+        raise TypeError("use _addChild() to add the first child")
+
+    __delitem__ = __setitem__
+
+_NO_CONTENTS = _NoContents()
+
+
 class Function(Documentable):
     documentation_location = DocLocation.PARENT_PAGE
-    kind = "Function"
-    linenumber = 0
+    __slots__ = ('kind', 'linenumber', 'decorators', 'argspec',
+                 'contents', 'orderedcontents', 'annotation',
+                 'parsed_docstring', 'parsed_type', '_deprecated_info')
     def setup(self):
-        super(Function, self).setup()
+        # Functions and attributes hardly ever have children, so they share
+        # empty contents until the first one is added.
+        self.contents = _NO_CONTENTS
+        self.orderedcontents = ()
+        self.linenumber = 0
         if isinstance(self.parent, Class):
             self.kind = "Method"
+        else:
+            self.kind = "Function"
     def docsources(self):
         yield self
         if not isinstance(self.parent, Class):
@@ -285,9 +405,14 @@ class Function(Documentable):
 
 class Attribute(Documentable):
 
-    linenumber = 0
-    kind = "Attribute"
     documentation_location = DocLocation.PARENT_PAGE
+    __slots__ = ('kind', 'linenumber', 'contents', 'orderedcontents',
+                 'annotation', 'parsed_docstring', 'parsed_type')
+    def setup(self):
+        self.contents = _NO_CONTENTS
+        self.orderedcontents = ()
+        self.linenumber = 0
+        self.kind = "Attribute"
 
     def _localNameToFullName(self, name):
         return self.parent._localNameToFullName(name)
@@ -305,6 +430,191 @@ class PrivacyClass(Enum):
     VISIBLE = 2
 
 
+def parsePrivacyRule(text):
+    """Parse a privacy rule of the form C{PRIVACY:PATTERN}, as given to the
+    C{--privacy} option.
+
+    @return: A C{(PrivacyClass, pattern)} pair.
+    @raise ValueError: If C{text} is not such a rule.
+    """
+    privacy, sep, pattern = text.partition(':')
+    privacy = privacy.strip().upper()
+    pattern = pattern.strip()
+    if not sep or not pattern or privacy not in PrivacyClass.__members__:
+        raise ValueError(
+            "invalid privacy rule %r, expected PRIVACY:PATTERN where "
+            "PRIVACY is one of %s" % (text, ', '.join(PrivacyClass.__members__)))
+    return PrivacyClass[privacy], pattern
+
+
+def compilePrivacyRules(rules):
+    """Compile a sequence of C{(PrivacyClass, pattern)} rules into a
+    function that takes a fullName and returns the privacy of the last rule
+    whose pattern matches it, or C{None} if none does.
+
+    In patterns, C{*} matches any characters, dots included, and C{?}
+    matches a single character.
+    """
+    rules = list(rules)
+    if not rules:
+        return lambda fullName: None
+    # The rules are tried by a few regular expressions, with a group for
+    # each rule.  Alternatives are tried from left to right, so the last
+    # rule goes first.  Python 2 allows at most 100 groups in a regular
+    # expression, hence the chunks.
+    matches = []
+    end = len(rules)
+    while end > 0:
+        start = max(0, end - _RULES_PER_REGEX)
+        alternatives = []
+        for i in reversed(range(start, end)):
+            regex = ''.join(
+                '.*' if c == '*' else '.' if c == '?' else re.escape(c)
+                for c in rules[i][1])
+            alternatives.append('(%s)' % (regex,))
+        matches.append((end, re.compile(
+            '(?:%s)\\Z' % ('|'.join(alternatives),), re.DOTALL).match))
+        end = start
+    def matcher(fullName):
+        for end, match in matches:
+            m = match(fullName)
+            if m is not None:
+                return rules[end - m.lastindex][0]
+        return None
+    return matcher
+
+# How many privacy rules compilePrivacyRules() puts in one regular
+# expression.
+_RULES_PER_REGEX = 90
+
+
+def stronglyConnectedComponents(nodes, edges):
+    """Find the strongly connected components of a directed graph, with
+    Tarjan's algorithm.  The graph is walked without recursion, so it can
+    be arbitrarily deep.
+
+    @param nodes: The nodes of the graph to start walking from.
+    @param edges: A function that returns the nodes a node has edges to.
+        It is called once for each node, when the walk reaches it.
+    @return: An iterator over the components, as lists of nodes, in an
+        order where each component comes after the components it has
+        edges to.  Each component is produced as soon as it is found,
+        before the rest of the graph is walked.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    onstack = set()
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        onstack.add(root)
+        work = [(root, iter(edges(root)))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    onstack.add(child)
+                    work.append((child, iter(edges(child))))
+                    break
+                elif child in onstack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        onstack.remove(member)
+                        component.append(member)
+                        if member is node:
+                            break
+                    yield component
+
+
+class ClassHierarchy(object):
+    """What the pages of classes show about their base classes and
+    subclasses, worked out once for each class and shared by all pages.
+
+    Only to be used once the system has been processed, see
+    L{System.classHierarchy}.
+    """
+
+    def __init__(self):
+        self._inherited = {}
+        self._overriddenIn = {}
+        self._baseLists = {}
+
+    def linearization(self, cls):
+        """Return C{cls} followed by its known base classes, each of them
+        once, in the order in which names are looked up in them."""
+        return cls.mro
+
+    def inherited(self, cls):
+        """Return a dictionary that maps the names defined in the base
+        classes of C{cls} to the first definition of each name in the
+        L{linearization}."""
+        inherited = self._inherited.get(cls)
+        if inherited is None:
+            inherited = self._inherited[cls] = {}
+            for b in reversed(self.linearization(cls)[1:]):
+                inherited.update(b.contents)
+        return inherited
+
+    def overriddenIn(self, cls):
+        """Return a dictionary that maps the names defined in C{cls} to the
+        visible subclasses that override them, only counting the first
+        override on each line of descent."""
+        overriddenIn = self._overriddenIn.get(cls)
+        if overriddenIn is None:
+            overriddenIn = self._overriddenIn[cls] = {}
+            def visit(c, names):
+                for sc in c.subclasses:
+                    if not sc.isVisible:
+                        continue
+                    overridden = [name for name in names
+                                  if name in sc.contents]
+                    for name in overridden:
+                        overriddenIn.setdefault(name, []).append(sc)
+                    remaining = names.difference(overridden)
+                    if remaining:
+                        visit(sc, remaining)
+            visit(cls, frozenset(cls.contents))
+        return overriddenIn
+
+    def baseLists(self, cls):
+        """Return the attributes shown on the page of C{cls}, grouped by
+        the path they are inherited through.
+
+        @return: A list of C{(path, attributes)} pairs, where C{path} is a
+            tuple of classes from the one that defines C{attributes} down to
+            C{cls}, and C{attributes} are its visible attributes that no
+            other class on the path overrides.  Paths that leave no
+            attributes are left out.
+        """
+        baseLists = self._baseLists.get(cls)
+        if baseLists is None:
+            baseLists = self._baseLists[cls] = []
+            own = [o for o in cls.orderedcontents if o.isVisible]
+            if own:
+                baseLists.append(((cls,), own))
+            contents = cls.contents
+            for b in cls.baseobjects:
+                if b is None:
+                    continue
+                for path, attrs in self.baseLists(b):
+                    attrs = [o for o in attrs if o.name not in contents]
+                    if attrs:
+                        baseLists.append((path + (cls,), attrs))
+        return baseLists
+
 
 class System(object):
     """A collection of related documentable objects.
@@ -321,10 +631,27 @@ class System(object):
     # not done here for circularity reasons:
     #defaultBuilder = astbuilder.ASTBuilder
     sourcebase = None
+    # An astbuilder.ASTCache, if parsed modules should be cached on disk.
+    astcache = None
+    # Called as xrefobserver(obj, identifier, href) for every cross
+    # reference resolved while rendering the docstring of obj.
+    xrefobserver = None
+    # The names of the standard library modules to link to, or None for
+    # those of the running Python.
+    stdlib_modules = None
+    # The (PrivacyClass, pattern) rules systems of this class start with,
+    # see addPrivacyRule().
+    default_privacy_rules = ()
 
     def __init__(self, options=None):
         self.allobjects = {}
         self.orderedallobjects = []
+        # Maps each type of object in the system to the (position in
+        # orderedallobjects, object) pairs of its instances.
+        self._objectsByType = {}
+        # Maps names to the objects that have a child of that name, see
+        # objectsDefining().  Built when first needed.
+        self._objectsDefining = None
         self.rootobjects = []
         self.warnings = {}
         self.packages = []
@@ -343,10 +670,30 @@ class System(object):
         self.needsnl = False
         self.once_msgs = set()
         self.unprocessed_modules = set()
+        # Maps file paths to ASTs (or None if parsing failed) parsed ahead
+        # of processing, see processingOrder().
+        self.parsed_modules = {}
+        # Maps (object, docformat, docstring) to the parse of that docstring
+        # of that object until its page is written, see
+        # epydoc2stan.get_parsed_docstring().
+        self.parsed_docstrings = {}
+        # Maps (scope, identifier) to the href of an L{identifier} reference
+        # and the problems found resolving it, see
+        # epydoc2stan._EpydocLinker.resolve_identifier_xref().
+        self.resolved_xrefs = {}
+        # Maps objects to their PrivacyClass, see privacyClassOf().  Built
+        # when first needed.
+        self._privacyClasses = None
+        self.privacy_rules = list(self.default_privacy_rules)
+        # See classHierarchy().
+        self._classHierarchy = None
+        # privacy_rules compiled by compilePrivacyRules().
+        self._privacyMatcher = None
         self.module_count = 0
         self.processing_modules = []
         self.buildtime = datetime.datetime.now()
         self.intersphinx = SphinxInventory(logger=self.msg)
+        self.stats = Stats()
 
     def verbosity(self, section=None):
         if isinstance(section, str):
@@ -399,11 +746,44 @@ class System(object):
 
     def objectsOfType(self, cls):
         """Iterate over all instances of C{cls} present in the system. """
-        for o in self.orderedallobjects:
-            if isinstance(o, cls):
-                yield o
+        indexes = [index for t, index in self._objectsByType.items()
+                   if issubclass(t, cls)]
+        if len(indexes) == 1:
+            entries = iter(indexes[0])
+        else:
+            # Keep the order in which the objects were added.
+            entries = heapq.merge(*indexes)
+        for _, o in entries:
+            yield o
+
+    def objectsDefining(self, name):
+        """Return the objects that have a child called C{name}, in the order
+        they were added to the system.
+        """
+        index = self._objectsDefining
+        if index is None:
+            index = self._objectsDefining = {}
+            for o in self.orderedallobjects:
+                for childname in o.contents:
+                    index.setdefault(childname, []).append(o)
+        return index.get(name, ())
 
     def privacyClass(self, ob):
+        """Return the L{PrivacyClass} of C{ob}, whose parent is not hidden.
+
+        The last of the L{privacy rules<addPrivacyRule>} that matches the
+        fullName of C{ob} decides.  Override this to change which objects are
+        shown in ways the rules cannot express; everything in a hidden object
+        is hidden anyway.  Use L{Documentable.privacyClass} to find out the
+        privacy of an object.
+        """
+        matcher = self._privacyMatcher
+        if matcher is None:
+            matcher = self._privacyMatcher = compilePrivacyRules(
+                self.privacy_rules)
+        privacy = matcher(ob.fullName())
+        if privacy is not None:
+            return privacy
         if ob.kind is None:
             return PrivacyClass.HIDDEN
         if ob.name.startswith('_') and \
@@ -411,18 +791,73 @@ class System(object):
             return PrivacyClass.PRIVATE
         return PrivacyClass.VISIBLE
 
+    def classHierarchy(self):
+        """Return the L{ClassHierarchy} of the classes in this system."""
+        hierarchy = self._classHierarchy
+        if hierarchy is None:
+            hierarchy = self._classHierarchy = ClassHierarchy()
+        return hierarchy
+
+    def addPrivacyRule(self, privacy, pattern):
+        """Give the objects whose fullName matches C{pattern} the
+        L{PrivacyClass} C{privacy}, taking precedence over the rules added
+        before.  See L{compilePrivacyRules} for the syntax of C{pattern}.
+        """
+        self.privacy_rules.append((privacy, pattern))
+        self._privacyMatcher = None
+        self._privacyClasses = None
+
+    def privacyClassOf(self, ob):
+        """Return the L{PrivacyClass} of C{ob}.
+
+        The privacy of all objects is worked out in one pass from the root
+        objects down, the first time it is needed after the objects of the
+        system changed.
+        """
+        privacy = self._privacyClasses
+        if privacy is None:
+            privacy = self._privacyClasses = {}
+            for o in self.orderedallobjects:
+                self._classifyPrivacy(o, privacy)
+        result = privacy.get(ob)
+        if result is None:
+            result = self._classifyPrivacy(ob, privacy)
+        return result
+
+    def _classifyPrivacy(self, ob, privacy):
+        # Objects can be reparented under a parent that was added after
+        # them, so make sure the ancestors of ob are classified first.
+        chain = []
+        o = ob
+        while o is not None and o not in privacy:
+            chain.append(o)
+            o = o.parent
+        for o in reversed(chain):
+            parent = o.parent
+            if parent is not None and privacy[parent] is PrivacyClass.HIDDEN:
+                privacy[o] = PrivacyClass.HIDDEN
+            else:
+                privacy[o] = self.privacyClass(o)
+        return privacy[ob]
+
     def addObject(self, obj):
         """Add C{object} to the system."""
-        if obj.parent and obj.parent.fullName() != obj.fullName():
-            obj.parent.orderedcontents.append(obj)
-            obj.parent.contents[obj.name] = obj
+        self._objectsDefining = None
+        self._privacyClasses = None
+        self._classHierarchy = None
+        self.resolved_xrefs.clear()
+        fullName = obj.fullName()
+        if obj.parent and obj.parent.fullName() != fullName:
+            obj.parent._addChild(obj)
         else:
             self.rootobjects.append(obj)
+        self._objectsByType.setdefault(type(obj), []).append(
+            (len(self.orderedallobjects), obj))
         self.orderedallobjects.append(obj)
-        if obj.fullName() in self.allobjects:
+        if fullName in self.allobjects:
             self.handleDuplicate(obj)
         else:
-            self.allobjects[obj.fullName()] = obj
+            self.allobjects[fullName] = obj
 
     # if we assume:
     #
@@ -602,6 +1037,7 @@ class System(object):
                 remove(c)
         remove(prev)
         prev.name = obj.name + ' ' + str(i)
+        prev._invalidateFullName()
         def readd(o):
             self.allobjects[o.fullName()] = o
             for c in o.orderedcontents:
@@ -634,6 +1070,7 @@ class System(object):
         builder = self.defaultBuilder(self)
         ast = builder.parseFile(mod.filepath)
         if ast:
+            self.stats.count('modules')
             self.processing_modules.append(mod.fullName())
             self.msg("processModule", "processing %s"%(self.processing_modules), 1)
             builder.processModuleAST(ast, mod)
@@ -649,10 +1086,116 @@ class System(object):
             sum(len(v) for v in self.warnings.values()),))
 
 
-    def process(self):
-        while self.unprocessed_modules:
+    def importedModules(self, mod):
+        """Return the unprocessed modules that C{mod} imports.
+
+        The module is parsed to find out, and its AST is kept in
+        L{parsed_modules} until it is processed.
+        """
+        from pydoctor import astbuilder
+        path = getattr(mod, 'filepath', None)
+        if path is None or mod not in self.unprocessed_modules:
+            return []
+        if path not in self.parsed_modules:
+            with self.stats.span('parsing'):
+                self.parsed_modules[path] = astbuilder.tryParseFile(
+                    path, self.astcache)
+        modast = self.parsed_modules[path]
+        if modast is None:
+            return []
+        imported = []
+        with self.stats.span('imports'):
+            for name in astbuilder.findImportedModules(modast, mod):
+                ob = self.allobjects.get(name)
+                if isinstance(ob, Package):
+                    ob = ob.contents.get('__init__')
+                if ob in self.unprocessed_modules and ob is not mod:
+                    imported.append(ob)
+        return imported
+
+    def processingOrder(self, modules=None):
+        """Generate the unprocessed modules in the order to process them.
+
+        Modules come after the modules they import, so that processing
+        them does not need to process other modules first, except within
+        import cycles.  Apart from that, modules are in the order they
+        were added to the system.
+
+        The order is worked out as it is generated, parsing modules as they
+        are reached, and each module comes out as soon as the modules it
+        imports have.  Process the modules as they come, so that only a few
+        ASTs are kept in L{parsed_modules} at a time.
+
+        @param modules: If given, only generate these modules and the
+            modules they import, directly or not.
+        """
+        from pydoctor import astbuilder
+        if modules is None:
+            modules = self.unprocessed_modules
+        wanted = set(mod for mod in modules if mod in self.unprocessed_modules)
+        roots = [o for o in self.orderedallobjects if o in wanted]
+        if self.options.jobs > 1:
+            paths = [mod.filepath for mod in roots
+                     if getattr(mod, 'filepath', None) is not None
+                     and mod.filepath not in self.parsed_modules]
+            if len(paths) > 1:
+                # Parsing is independent for each module, unlike the rest
+                # of the processing, so it can be done in parallel.  The
+                # workers time it and add it to the 'parsing' span.
+                self.parsed_modules.update(astbuilder.parseFiles(
+                    paths, self.options.jobs, self.astcache, self.stats))
+        for component in stronglyConnectedComponents(
+                roots, self.importedModules):
+            if len(component) > 1:
+                members = set(component)
+                component = [o for o in self.orderedallobjects
+                             if o in members]
+            for mod in component:
+                yield mod
+
+    def subjectModules(self, fullName):
+        """Return the modules to process to document the object called
+        C{fullName}: all modules in it if it is a module or package, else
+        the module it is defined in.
+        """
+        name = fullName
+        while name not in self.allobjects:
+            if '.' not in name:
+                return []
+            name = name.rsplit('.', 1)[0]
+        ob = self.allobjects[name]
+        if name != fullName:
+            if isinstance(ob, Package):
+                ob = ob.contents['__init__']
+            return [ob] if isinstance(ob, Module) else []
+        modules = []
+        stack = [ob]
+        while stack:
+            ob = stack.pop()
+            if isinstance(ob, Module):
+                modules.append(ob)
+            if isinstance(ob, (Module, Package)):
+                stack.extend(ob.orderedcontents)
+        return modules
+
+    def process(self, modules=None):
+        """Process the modules of the system.
+
+        @param modules: If given, only process these modules and the
+            modules they import, directly or not, leaving the others
+            unprocessed.  See L{subjectModules}.
+        """
+        for mod in self.processingOrder(modules):
+            if mod.state is ProcessingState.UNPROCESSED:
+                self.processModule(mod)
+        while modules is None and self.unprocessed_modules:
+            # Modules added while processing.
             mod = next(iter(self.unprocessed_modules))
             self.processModule(mod)
+        # The kinds and bases of objects can change while processing, so
+        # work out what depends on them afresh when it is next needed.
+        self._privacyClasses = None
+        self._classHierarchy = None
 
 
     def fetchIntersphinxInventories(self, cache):
@@ -0,0 +1,236 @@
+"""Saving a processed L{System<model.System>} and loading it back.
+
+A snapshot holds what the HTML writer and the Sphinx inventory need to know
+about the objects of a system, so that they can be generated from a model
+saved by an earlier run, without finding, parsing and processing the code
+again::
+
+    pydoctor --save-model=project.model --add-package=project
+    pydoctor --load-model=project.model --html-output=apidocs
+
+The file is zlib compressed JSON.  What is only needed while processing,
+like the decorators of classes, is left out.
+"""
+
+from __future__ import print_function
+
+import ast
+import importlib
+import json
+import zlib
+
+from pydoctor import __version__, epydoc2stan, model
+from pydoctor.astutils import node2source
+
+# Files in other versions of the format are refused.  Bump it whenever what
+# is saved changes.
+FORMAT_VERSION = 1
+
+# Attributes saved as they are, when they differ from the ones of a new
+# object of the same class.
+_PLAIN_ATTRIBUTES = (
+    'linenumber', 'sourceHref', 'filepath', 'all', 'rawbases',
+    'bases', 'argspec', '_localNameToFullName_map', 'implements_directly',
+    'isinterface', 'isschemafield', 'isinterfaceclass', 'implementsOnly',
+    '_deprecated_info',
+    )
+
+# Attributes that refer to other objects, saved as their indexes.
+_REFERENCE_ATTRIBUTES = (
+    'parentMod', 'baseobjects', 'subclasses', 'implementedby_directly',
+    )
+
+_MISSING = object()
+
+
+def _dottedName(cls):
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+def _importClass(name):
+    modname, _, clsname = name.rpartition('.')
+    try:
+        return getattr(importlib.import_module(modname), clsname)
+    except (ImportError, AttributeError, ValueError):
+        raise ValueError("cannot import %s, which the model uses" % (name,))
+
+
+def _parseExpression(source):
+    return ast.parse(source, mode='eval').body
+
+
+def dumpSystem(system):
+    """Return a snapshot of C{system} that can be dumped as JSON.
+
+    Objects are saved in the order they were added to the system, and
+    refer to each other by their position in that order.
+    """
+    objects = system.orderedallobjects
+    index = dict((o, i) for i, o in enumerate(objects))
+    def ref(o):
+        return None if o is None else index[o]
+    types = []
+    typeIndexes = {}
+    templates = {}
+    records = []
+    for o in objects:
+        cls = type(o)
+        t = typeIndexes.get(cls)
+        if t is None:
+            t = typeIndexes[cls] = len(types)
+            types.append(_dottedName(cls))
+            # What a new object has does not need to be saved.
+            templates[cls] = cls(system, '', None)
+        template = templates[cls]
+        record = {'type': t, 'name': o.name, 'kind': o.kind,
+                  'privacy': o.privacyClass.name}
+        if o.docstring is not None:
+            record['docstring'] = o.docstring
+        if o.parent is not None:
+            record['parent'] = index[o.parent]
+            if o.parent.contents.get(o.name) is not o:
+                # A definition replaced by a later one of the same name,
+                # see System.handleDuplicate().
+                record['shadowed'] = True
+        if o.orderedcontents:
+            record['contents'] = [index[c] for c in o.orderedcontents]
+        for name in _PLAIN_ATTRIBUTES:
+            value = getattr(o, name, _MISSING)
+            if value is not _MISSING and \
+                   value != getattr(template, name, _MISSING):
+                record[name] = value
+        for name in _REFERENCE_ATTRIBUTES:
+            value = getattr(o, name, _MISSING)
+            if value is _MISSING or \
+                   value == getattr(template, name, _MISSING):
+                continue
+            if isinstance(value, list):
+                record[name] = [ref(v) for v in value]
+            else:
+                record[name] = ref(value)
+        if isinstance(o, model.Module) and o.state is not template.state:
+            record['state'] = o.state.name
+        if isinstance(o, model.Function) and o.decorators is not None:
+            record['decorators'] = [
+                node2source(d) for d in o.decorators]
+        annotation = getattr(o, 'annotation', None)
+        if annotation is not None:
+            record['annotation'] = node2source(annotation)
+        if getattr(o, 'parsed_docstring', None) is not None or \
+               getattr(o, 'parsed_type', None) is not None:
+            # These come from the fields of the docstring of the parent,
+            # which are parsed again when loading.
+            record['fields'] = True
+        records.append(record)
+    return {
+        'format': 'pydoctor-model',
+        'version': FORMAT_VERSION,
+        'pydoctor': __version__.short(),
+        'system': _dottedName(type(system)),
+        'docformat': system.options.docformat,
+        'packages': system.packages,
+        'privacy_rules': [[privacy.name, pattern]
+                          for privacy, pattern in system.privacy_rules],
+        'types': types,
+        'objects': records,
+        }
+
+
+def restoreSystem(system, snapshot):
+    """Add the objects of C{snapshot}, see L{dumpSystem}, to C{system},
+    which should not have any yet.
+
+    The privacy rules and docformat of the system are replaced by the ones
+    of the snapshot.
+    """
+    system.options.docformat = snapshot['docformat']
+    system.packages.extend(snapshot['packages'])
+    types = [_importClass(name) for name in snapshot['types']]
+    records = snapshot['objects']
+    objects = [types[r['type']](system, r['name'], r.get('docstring'))
+               for r in records]
+    for o, r in zip(objects, records):
+        if 'parent' in r:
+            o.parent = objects[r['parent']]
+    for o in objects:
+        system.addObject(o)
+    fieldparents = []
+    for o, r in zip(objects, records):
+        if 'contents' in r:
+            o.orderedcontents = [objects[i] for i in r['contents']]
+            o.contents = dict(
+                (objects[i].name, objects[i]) for i in r['contents']
+                if not records[i].get('shadowed'))
+        if r.get('fields') and o.parent not in fieldparents:
+            fieldparents.append(o.parent)
+    for o in fieldparents:
+        epydoc2stan.extract_fields(o)
+    for o, r in zip(objects, records):
+        o.kind = r['kind']
+        for name in _PLAIN_ATTRIBUTES:
+            if name in r:
+                setattr(o, name, r[name])
+        if 'argspec' in r:
+            args, varargname, kwargname, defaults = r['argspec']
+            o.argspec = (args, varargname, kwargname, tuple(defaults))
+        for name in _REFERENCE_ATTRIBUTES:
+            if name not in r:
+                continue
+            value = r[name]
+            if isinstance(value, list):
+                value = [None if i is None else objects[i] for i in value]
+            elif value is not None:
+                value = objects[value]
+            setattr(o, name, value)
+        if 'state' in r:
+            o.state = model.ProcessingState[r['state']]
+        if isinstance(o, model.Function):
+            decorators = r.get('decorators')
+            if decorators is not None:
+                decorators = [_parseExpression(d) for d in decorators]
+            o.decorators = decorators
+        if 'annotation' in r:
+            o.annotation = _parseExpression(r['annotation'])
+        if isinstance(o, model.Module) and \
+               getattr(o, 'filepath', None) is not None:
+            system.module_count += 1
+            if o.state is model.ProcessingState.UNPROCESSED:
+                system.unprocessed_modules.add(o)
+    system.privacy_rules = [(model.PrivacyClass[privacy], pattern)
+                            for privacy, pattern in snapshot['privacy_rules']]
+    system._privacyMatcher = None
+    system._privacyClasses = dict(
+        (o, model.PrivacyClass[r['privacy']])
+        for o, r in zip(objects, records))
+
+
+def save(system, path):
+    """Write a snapshot of C{system} to C{path}."""
+    text = json.dumps(dumpSystem(system), separators=(',', ':'),
+                      sort_keys=True)
+    with open(path, 'wb') as f:
+        f.write(zlib.compress(text.encode('utf-8')))
+
+
+def load(path):
+    """Read the snapshot written to C{path} by L{save}.
+
+    Pass it to L{restoreSystem} to get the objects back.
+
+    @raise ValueError: If the file is not a snapshot in the current
+        version of the format.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        snapshot = json.loads(zlib.decompress(data).decode('utf-8'))
+    except (zlib.error, ValueError):
+        snapshot = None
+    if not isinstance(snapshot, dict) or \
+           snapshot.get('format') != 'pydoctor-model':
+        raise ValueError("%s is not a pydoctor model" % (path,))
+    if snapshot.get('version') != FORMAT_VERSION:
+        raise ValueError(
+            "%s was saved in version %s of the model format, this is "
+            "version %d" % (path, snapshot.get('version'), FORMAT_VERSION))
+    return snapshot
@@ -0,0 +1,179 @@
+"""Instrumentation of a pydoctor run.
+
+The stages of a run are marked with named spans, and what they do is
+counted, so that a slow build can be pinned on the stage that got slower::
+
+    with system.stats.span('parsing'):
+        ...
+    system.stats.count('modules')
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+try:
+    import cProfile as profile
+except ImportError:
+    import profile
+
+# The spans that pydoctor marks.
+SPANS = (
+    'discovery', 'parsing', 'visiting', 'imports', 'docstrings', 'links',
+    'flattening', 'writing',
+    )
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class Stats(object):
+    """Timings of spans and counters for one run.
+
+    Spans nest.  The time spent in a span that was entered inside another
+    one only counts for the inner one, so the times of all spans add up to
+    the time spent in any of them.
+
+    @ivar times: Maps span names to the seconds spent in them.
+    @ivar calls: Maps span names to the number of times they were entered.
+    @ivar counters: Maps counter names to their values.
+    @ivar profiles: Maps the names of the spans to profile to a
+        C{profile.Profile}, once they have been entered.
+    """
+
+    def __init__(self, profile_spans=()):
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+        self.profiles = dict.fromkeys(profile_spans)
+        # Maps span names to the profile data merged from other instances.
+        self._merged_profiles = {}
+        self._start = _clock()
+        # [name, when the innermost span last started counting] of each
+        # span being timed, innermost last.
+        self._stack = []
+        # The stack depth at which the active profile was enabled.
+        self._profiling = None
+
+    def enter(self, name):
+        now = _clock()
+        stack = self._stack
+        if stack:
+            outer = stack[-1]
+            self.times[outer[0]] = self.times.get(outer[0], 0) + now - outer[1]
+        stack.append([name, now])
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if name in self.profiles and self._profiling is None:
+            # Only one profile can be active at a time; spans nested in a
+            # profiled one are part of its profile anyway.
+            prof = self.profiles[name]
+            if prof is None:
+                prof = self.profiles[name] = profile.Profile()
+            self._profiling = len(stack)
+            prof.enable()
+
+    def leave(self):
+        stack = self._stack
+        if self._profiling == len(stack):
+            self.profiles[stack[-1][0]].disable()
+            self._profiling = None
+        name, start = stack.pop()
+        now = _clock()
+        self.times[name] = self.times.get(name, 0) + now - start
+        if stack:
+            stack[-1][1] = now
+
+    @contextmanager
+    def span(self, name):
+        """Time the body of a C{with} statement as the span C{name}."""
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.leave()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def asDict(self):
+        """Return the statistics in a form that can be dumped as JSON."""
+        return {
+            'total_seconds': _clock() - self._start,
+            'spans': dict(
+                (name, {'seconds': self.times.get(name, 0),
+                        'calls': self.calls[name]})
+                for name in self.calls),
+            'counters': dict(self.counters),
+            }
+
+    def forWorker(self):
+        """Return a new instance that profiles the same spans as this one,
+        for a worker process to fill in and send back to L{merge}.
+        """
+        return Stats(self.profiles)
+
+    def profileData(self):
+        """Return the profiles taken so far, as a dict mapping span names
+        to data that can be pickled and passed to L{merge}.
+        """
+        data = {}
+        for name, prof in self.profiles.items():
+            if prof is not None:
+                prof.create_stats()
+                data[name] = prof.stats
+        return data
+
+    def merge(self, data, profiles=None):
+        """Add the spans and counters of C{data}, the L{asDict} of another
+        instance, for example one from a worker process, to these.
+
+        @param profiles: The L{profileData} of the other instance, to add
+            to the profiles of the same spans.
+        """
+        for name, span in data['spans'].items():
+            self.times[name] = self.times.get(name, 0) + span['seconds']
+            self.calls[name] = self.calls.get(name, 0) + span['calls']
+        for name, value in data['counters'].items():
+            self.count(name, value)
+        for name, stats in (profiles or {}).items():
+            if name in self.profiles:
+                self._merged_profiles.setdefault(name, []).append(stats)
+
+    def save(self, path):
+        """Write the statistics to C{path} as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.asDict(), f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    def saveProfiles(self, directory):
+        """Write the profile of every profiled span that was entered to
+        C{directory}, as C{<span>.prof} files that L{pstats} can read.
+
+        @return: The paths of the files written.
+        """
+        paths = []
+        for name, prof in sorted(self.profiles.items()):
+            sources = [_ProfileData(stats)
+                       for stats in self._merged_profiles.get(name, ())]
+            if prof is not None:
+                sources.insert(0, prof)
+            if sources:
+                path = os.path.join(directory, name + '.prof')
+                pstats.Stats(*sources).dump_stats(path)
+                paths.append(path)
+        return paths
+
+
+class _ProfileData(object):
+    """Profile data from L{Stats.profileData}, looking like a profiler to
+    L{pstats}.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
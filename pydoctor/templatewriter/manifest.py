@@ -0,0 +1,189 @@
+"""Bookkeeping for incremental HTML generation.
+
+The manifest records, for every page written, a fingerprint of the objects
+the page was rendered from and the cross references its docstrings resolved
+to.  On the next run, a page whose fingerprint is unchanged and whose cross
+references still resolve to the same places does not need to be rendered
+again.
+"""
+
+from __future__ import print_function
+
+import ast
+import hashlib
+import json
+import os
+
+from pydoctor import __version__, epydoc2stan, model
+from pydoctor.templatewriter import util
+
+MANIFEST_FILENAME = 'pydoctor-manifest.json'
+
+# Attributes that influence how an object is rendered, beyond the ones all
+# Documentables have.
+_RENDERED_ATTRIBUTES = (
+    'argspec', 'decorators', 'annotation', 'rawbases', 'bases',
+    'implements_directly', 'implementedby_directly', 'isinterface',
+    '_deprecated_info',
+    )
+
+
+def _stable(value):
+    """Convert C{value} into something with a stable C{repr}."""
+    if isinstance(value, model.Documentable):
+        return value.fullName()
+    if isinstance(value, ast.AST):
+        return ast.dump(value)
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    return value
+
+
+class _SilentLinker(epydoc2stan._EpydocLinker):
+    """A linker that resolves references without complaining about them.
+
+    Broken references are reported when the page is rendered, not when it
+    is checked.
+    """
+
+    def _warn(self, msg):
+        pass
+
+
+class PageManifest(object):
+    """The record of pages written to an output directory.
+
+    @ivar pages: Maps the file name of each page to a dictionary with its
+        C{fingerprint} and the C{xrefs} resolved while rendering it, as
+        C{[context fullName, identifier, href]} triples.
+    """
+
+    version = 1
+
+    def __init__(self, system, base):
+        self.system = system
+        self.path = os.path.join(base, MANIFEST_FILENAME)
+        self.base = base
+        options = system.options
+        self._salt = repr([
+            self.version, __version__.short(), options.docformat,
+            system.projectname, options.projecturl, system.sourcebase,
+            options.templatedir, util.templatesdigest(options.templatedir),
+            ])
+        self._own_digests = {}
+        self._subtree_digests = {}
+        self._subclass_digests = {}
+        self._xrefs = None
+        self.pages = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if data.get('salt') != self._salt:
+            return {}
+        return data['pages']
+
+    def save(self):
+        data = {'salt': self._salt, 'pages': self.pages}
+        with open(self.path, 'w') as f:
+            json.dump(data, f, sort_keys=True)
+
+    def _ownDigest(self, o):
+        digest = self._own_digests.get(o)
+        if digest is None:
+            data = [o.__class__.__name__, o.fullName(), o.kind,
+                    o.privacyClass.name, o.docstring, o.sourceHref,
+                    getattr(o, 'linenumber', None)]
+            for attr in _RENDERED_ATTRIBUTES:
+                data.append(_stable(getattr(o, attr, None)))
+            digest = hashlib.sha1(repr(data).encode('utf-8')).hexdigest()
+            self._own_digests[o] = digest
+        return digest
+
+    def _subtreeDigest(self, o):
+        digest = self._subtree_digests.get(o)
+        if digest is None:
+            h = hashlib.sha1(self._ownDigest(o).encode('ascii'))
+            for c in o.orderedcontents:
+                h.update(self._subtreeDigest(c).encode('ascii'))
+            digest = self._subtree_digests[o] = h.hexdigest()
+        return digest
+
+    def _subclassDigest(self, cls):
+        # Class pages list the known subclasses and which of them override
+        # each method.
+        digest = self._subclass_digests.get(cls)
+        if digest is None:
+            h = hashlib.sha1()
+            for sc in cls.subclasses:
+                data = [sc.fullName(), sc.privacyClass.name,
+                        sorted(sc.contents)]
+                h.update(repr(data).encode('utf-8'))
+                h.update(self._subclassDigest(sc).encode('ascii'))
+            digest = self._subclass_digests[cls] = h.hexdigest()
+        return digest
+
+    def fingerprint(self, ob):
+        """Compute a digest of everything that the page for C{ob} shows,
+        apart from the targets of its cross references.
+        """
+        h = hashlib.sha1(self._salt.encode('utf-8'))
+        h.update(self._subtreeDigest(ob).encode('ascii'))
+        shown = [ob]
+        shown.extend(ob.orderedcontents)
+        if isinstance(ob, model.Package):
+            shown.extend(ob.contents['__init__'].orderedcontents)
+        for o in shown:
+            for source in o.docsources():
+                if source is not o:
+                    h.update(self._ownDigest(source).encode('ascii'))
+        if isinstance(ob, model.Class):
+            for b in ob.allbases():
+                h.update(self._subtreeDigest(b).encode('ascii'))
+            h.update(self._subclassDigest(ob).encode('ascii'))
+        return h.hexdigest()
+
+    def isUpToDate(self, ob, filename):
+        """Can the page for C{ob} that was written to C{filename} on a
+        previous run be kept as it is?
+        """
+        entry = self.pages.get(filename)
+        if entry is None:
+            return False
+        if not os.path.exists(os.path.join(self.base, filename)):
+            return False
+        if entry['fingerprint'] != self.fingerprint(ob):
+            return False
+        for context, identifier, href in entry['xrefs']:
+            obj = self.system.objForFullName(context)
+            if obj is None:
+                return False
+            if _SilentLinker(obj).resolve_identifier_xref(identifier) != href:
+                return False
+        return True
+
+    def startPage(self, ob, filename):
+        """Start recording the cross references of the page for C{ob}."""
+        self._xrefs = []
+        self.system.xrefobserver = self._observeXref
+
+    def finishPage(self, ob, filename):
+        """Record the page for C{ob} as written to C{filename}."""
+        self.system.xrefobserver = None
+        xrefs = []
+        seen = set()
+        for xref in self._xrefs:
+            if xref not in seen:
+                seen.add(xref)
+                xrefs.append(list(xref))
+        self._xrefs = None
+        self.pages[filename] = {
+            'fingerprint': self.fingerprint(ob),
+            'xrefs': xrefs,
+            }
+
+    def _observeXref(self, obj, identifier, href):
+        self._xrefs.append((obj.fullName(), identifier, href))
@@ -2,7 +2,7 @@
 
 from __future__ import print_function
 
-from twisted.web.template import tags, Element, renderer, XMLFile
+from twisted.web.template import tags, Element, renderer
 
 from pydoctor import epydoc2stan, model
 from pydoctor.templatewriter.pages.table import ChildTable
@@ -68,7 +68,7 @@ class CommonPage(Element):
 
     @property
     def loader(self):
-        return XMLFile(util.templatefilepath('common.html'))
+        return util.templateloader(self.ob.system, 'common.html')
 
     def title(self):
         return self.ob.fullName()
@@ -210,32 +210,6 @@ class PackagePage(CommonPage):
 class ModulePage(CommonPage):
     pass
 
-def overriding_subclasses(c, name, firstcall=True):
-    if not firstcall and name in c.contents:
-        yield c
-    else:
-        for sc in c.subclasses:
-            if sc.isVisible:
-                for sc2 in overriding_subclasses(sc, name, False):
-                    yield sc2
-
-def nested_bases(b):
-    r = [(b,)]
-    for b2 in b.baseobjects:
-        if b2 is None:
-            continue
-        for n in nested_bases(b2):
-            r.append(n + (b,))
-    return r
-
-def unmasked_attrs(baselist):
-    maybe_masking = set()
-    for b in baselist[1:]:
-        maybe_masking.update(set([o.name for o in b.orderedcontents]))
-    return [o for o in baselist[0].orderedcontents
-            if o.isVisible and o.name not in maybe_masking]
-
-
 def assembleList(system, label, lst, idbase):
     lst2 = []
     for name in lst:
@@ -265,11 +239,8 @@ def assembleList(system, label, lst, idbase):
 class ClassPage(CommonPage):
     def __init__(self, ob, docgetter=None):
         CommonPage.__init__(self, ob, docgetter)
-        self.baselists = []
-        for baselist in nested_bases(self.ob):
-            attrs = unmasked_attrs(baselist)
-            if attrs:
-                self.baselists.append((baselist, attrs))
+        self.hierarchy = ob.system.classHierarchy()
+        self.baselists = self.hierarchy.baseLists(ob)
         self.overridenInCount = 0
 
     def extras(self):
@@ -331,13 +302,11 @@ class ClassPage(CommonPage):
 
     def functionExtras(self, data):
         r = []
-        for b in self.ob.allbases(include_self=False):
-            if data.name not in b.contents:
-                continue
-            overridden = b.contents[data.name]
+        overridden = self.hierarchy.inherited(self.ob).get(data.name)
+        if overridden is not None:
             r.append(tags.div(class_="interfaceinfo")('overrides ', util.taglink(overridden)))
-            break
-        ocs = sorted(overriding_subclasses(self.ob, data.name), key=lambda o:o.fullName().lower())
+        ocs = sorted(self.hierarchy.overriddenIn(self.ob).get(data.name, ()),
+                     key=lambda o:o.fullName().lower())
         if ocs:
             self.overridenInCount += 1
             idbase = 'overridenIn' + str(self.overridenInCount)
@@ -368,7 +337,7 @@ class ZopeInterfaceClassPage(ClassPage):
         for interface in self.ob.allImplementedInterfaces:
             if interface in system.allobjects:
                 io = system.allobjects[interface]
-                for io2 in io.allbases(include_self=True):
+                for io2 in self.hierarchy.linearization(io):
                     if methname in io2.contents:
                         return io2.contents[methname]
         return None
@@ -1,17 +1,19 @@
 from __future__ import print_function
 
 from pydoctor.templatewriter import util
-from twisted.web.template import Element, XMLFile, renderer
+from twisted.web.template import Element, renderer
 
 
 class AttributeChild(Element):
 
-    loader = XMLFile(util.templatefilepath('attribute-child.html'))
-
     def __init__(self, docgetter, ob):
         self.docgetter = docgetter
         self.ob = ob
 
+    @property
+    def loader(self):
+        return util.templateloader(self.ob.system, 'attribute-child.html')
+
     @renderer
     def class_(self, request, tag):
         class_ = self.ob.css_class
@@ -2,21 +2,23 @@ from __future__ import print_function
 
 import ast
 
-import astor
+from pydoctor.astutils import node2source
 from pydoctor.templatewriter import util
 from pydoctor.templatewriter.pages import signature
-from twisted.web.template import Element, XMLFile, renderer, tags
+from twisted.web.template import Element, renderer, tags
 
 
 class FunctionChild(Element):
 
-    loader = XMLFile(util.templatefilepath('function-child.html'))
-
     def __init__(self, docgetter, ob, functionExtras):
         self.docgetter = docgetter
         self.ob = ob
         self._functionExtras = functionExtras
 
+    @property
+    def loader(self):
+        return util.templateloader(self.ob.system, 'function-child.html')
+
     @renderer
     def class_(self, request, tag):
         class_ = self.ob.css_class
@@ -47,7 +49,7 @@ class FunctionChild(Element):
                         if fn == "twisted.python.deprecate.deprecated":
                             break
 
-                decorators.append(astor.to_source(dec).strip())
+                decorators.append(node2source(dec))
 
         if decorators:
             decorator = [('@' + dec, tags.br()) for dec in decorators]
@@ -1,7 +1,7 @@
 from __future__ import print_function
 
 from pydoctor.templatewriter import util
-from twisted.web.template import Element, TagLoader, XMLFile, renderer
+from twisted.web.template import Element, TagLoader, renderer
 
 
 class TableRow(Element):
@@ -33,7 +33,6 @@ class TableRow(Element):
 
 
 class ChildTable(Element):
-    loader = XMLFile(util.templatefilepath('table.html'))
     last_id = 0
 
     def __init__(self, docgetter, ob, children):
@@ -44,6 +43,10 @@ class ChildTable(Element):
         self._id = ChildTable.last_id
         self.ob = ob
 
+    @property
+    def loader(self):
+        return util.templateloader(self.system, 'table.html')
+
     @renderer
     def id(self, request, tag):
         return 'id'+str(self._id)
@@ -4,7 +4,7 @@ from __future__ import print_function
 
 from pydoctor import epydoc2stan, model
 from pydoctor.templatewriter import util
-from twisted.web.template import Element, TagLoader, XMLFile, renderer, tags
+from twisted.web.template import Element, TagLoader, renderer, tags
 
 
 def moduleSummary(modorpack):
@@ -29,7 +29,7 @@ class ModuleIndexPage(Element):
 
     @property
     def loader(self):
-        return XMLFile(util.templatefilepath('summary.html'))
+        return util.templateloader(self.system, 'summary.html')
 
     def __init__(self, system):
         self.system = system
@@ -88,7 +88,7 @@ class ClassIndexPage(Element):
 
     @property
     def loader(self):
-        return XMLFile(util.templatefilepath('summary.html'))
+        return util.templateloader(self.system, 'summary.html')
 
     def __init__(self, system):
         self.system = system
@@ -169,7 +169,7 @@ class NameIndexPage(Element):
 
     @property
     def loader(self):
-        return XMLFile(util.templatefilepath('nameIndex.html'))
+        return util.templateloader(self.system, 'nameIndex.html')
 
     def __init__(self, system):
         self.system = system
@@ -203,7 +203,7 @@ class IndexPage(Element):
 
     @property
     def loader(self):
-        return XMLFile(util.templatefilepath('index.html'))
+        return util.templateloader(self.system, 'index.html')
 
     def __init__(self, system):
         self.system = system
@@ -275,7 +275,7 @@ class UndocumentedSummaryPage(Element):
 
     @property
     def loader(self):
-        return XMLFile(util.templatefilepath('summary.html'))
+        return util.templateloader(self.system, 'summary.html')
 
     def __init__(self, system):
         self.system = system
@@ -2,11 +2,12 @@
 
 from __future__ import print_function
 
+import hashlib
 import os
 
 from pydoctor import model
 from twisted.python.filepath import FilePath
-from twisted.web.template import tags
+from twisted.web.template import XMLFile, tags
 
 from six.moves.urllib.parse import quote
 
@@ -18,13 +19,52 @@ def link(o):
 def srclink(o):
     return o.sourceHref
 
-def templatefile(filename):
-    abspath = os.path.abspath(__file__)
-    pydoctordir = os.path.dirname(os.path.dirname(abspath))
-    return os.path.join(pydoctordir, 'templates', filename)
+# The directory of the templates and static files pydoctor comes with.
+_templatesdir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
 
-def templatefilepath(filename):
-    return FilePath(templatefile(filename))
+def templatefile(filename, templatedir=None):
+    """Return the path of the template or static file C{filename}: the one
+    in C{templatedir} if there is one, else the one pydoctor comes with."""
+    if templatedir is not None:
+        path = os.path.join(templatedir, filename)
+        if os.path.isfile(path):
+            return path
+    return os.path.join(_templatesdir, filename)
+
+def templatesdigest(templatedir=None):
+    """Return a digest of the contents of the page templates used with the
+    template directory C{templatedir}."""
+    digest = hashlib.sha1()
+    for filename in sorted(os.listdir(_templatesdir)):
+        if filename.endswith('.html'):
+            with open(templatefile(filename, templatedir), 'rb') as f:
+                content = f.read()
+            digest.update(filename.encode('utf-8'))
+            digest.update(hashlib.sha1(content).digest())
+    return digest.hexdigest()
+
+def templatefilepath(filename, templatedir=None):
+    return FilePath(templatefile(filename, templatedir))
+
+# Maps (template directory, filename) to the loader of that template.
+_loaders = {}
+
+def templateloader(system, filename):
+    """Return the loader of the template C{filename} for the template
+    directory of C{system}.
+
+    Loaders are shared by all pages, so each template is parsed once per
+    process.  The flattener clones the tags it renders, so pages never
+    change the shared templates.
+    """
+    templatedir = system.options.templatedir
+    key = (templatedir, filename)
+    loader = _loaders.get(key)
+    if loader is None:
+        loader = _loaders[key] = XMLFile(
+            templatefilepath(filename, templatedir))
+    return loader
 
 def fillSlots(tag, **kw):
     for k, v in kw.items():
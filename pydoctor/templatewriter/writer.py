@@ -2,89 +2,239 @@
 
 from __future__ import print_function
 
+import multiprocessing
 import os
 import shutil
 
 from pydoctor import model
 from pydoctor.templatewriter import DOCTYPE, pages, summary
+from pydoctor.templatewriter.manifest import PageManifest
 from pydoctor.templatewriter.util import link, templatefile
-from twisted.web.template import flattenString
+from twisted.web.template import flatten
+
+
+class _TimedFile(object):
+    """Collects what is written into chunks of at least C{chunksize} bytes
+    before writing them to a file, counting the time spent writing as the
+    C{writing} span.
+
+    The flattener produces many small strings; writing each of them on its
+    own would mostly time the timing.
+    """
+
+    chunksize = 65536
+
+    def __init__(self, fobj, stats):
+        self.fobj = fobj
+        self.stats = stats
+        self._pending = []
+        self._size = 0
+
+    def write(self, data):
+        self._pending.append(data)
+        self._size += len(data)
+        if self._size >= self.chunksize:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            with self.stats.span('writing'):
+                self.fobj.write(b''.join(self._pending))
+            self._pending = []
+            self._size = 0
 
 
 def flattenToFile(fobj, page):
+    """Write C{page} to C{fobj} while it is being flattened, so that the
+    whole page never needs to be in memory at once.
+    """
     fobj.write(DOCTYPE)
     err = []
     def e(r):
         err.append(r.value)
-    flattenString(None, page).addCallback(fobj.write).addErrback(e)
+    flatten(None, page, fobj.write).addErrback(e)
     if err:
         raise err[0]
 
 
+# The writer whose pages are being rendered, in a worker process forked by
+# TemplateWriter._writeInParallel.
+_worker_writer = None
+
+def _writePagesInWorker(chunk):
+    """Write the pending pages with indices in C{range(*chunk)}."""
+    writer = _worker_writer
+    system = writer.system
+    system.epytextproblems = []
+    system.stats = system.stats.forWorker()
+    entries = {}
+    for ob, filename, pclass in writer.pending_pages[chunk[0]:chunk[1]]:
+        writer._writePage(ob, filename, pclass)
+        if writer.manifest is not None:
+            entries[filename] = writer.manifest.pages[filename]
+    stats = system.stats
+    return (system.epytextproblems, entries,
+            stats.asDict(), stats.profileData())
+
+
+def pageClassFor(ob):
+    """Return the page class that renders C{ob}: the one in L{pages} named
+    after the first class in the MRO of C{ob} that has one, or
+    L{pages.CommonPage}."""
+    # brrrrrrr!
+    d = pages.__dict__
+    for c in ob.__class__.__mro__:
+        n = c.__name__ + 'Page'
+        if n in d:
+            return d[n]
+    return pages.CommonPage
+
+
 class TemplateWriter:
     def __init__(self, filebase):
         self.base = filebase
         self.written_pages = 0
         self.total_pages = 0
-        self.dry_run = False
+        self.manifest = None
+        # The (object, filename, page class) of each page that still has
+        # to be written by writeIndividualFiles.
+        self.pending_pages = []
+        self.report_progress = True
 
     def prepOutputDirectory(self):
         if not os.path.exists(self.base):
             os.mkdir(self.base)
-        shutil.copyfile(templatefile('apidocs.css'),
-                        os.path.join(self.base, 'apidocs.css'))
-        shutil.copyfile(templatefile('bootstrap.min.css'),
-                        os.path.join(self.base, 'bootstrap.min.css'))
-        shutil.copyfile(templatefile('pydoctor.js'),
-                        os.path.join(self.base, 'pydoctor.js'))
+        templatedir = self.system.options.templatedir
+        for filename in 'apidocs.css', 'bootstrap.min.css', 'pydoctor.js':
+            shutil.copyfile(templatefile(filename, templatedir),
+                            os.path.join(self.base, filename))
 
     def writeIndividualFiles(self, obs, functionpages=False):
-        self.dry_run = True
-        for ob in obs:
-            self.writeDocsFor(ob, functionpages=functionpages)
-        self.dry_run = False
-        for ob in obs:
-            self.writeDocsFor(ob, functionpages=functionpages)
+        if self.system.options.htmlincremental:
+            self.manifest = PageManifest(self.system, self.base)
+        plan = self.planPages(obs, functionpages)
+        if self.manifest is not None:
+            plan = [page for page in plan
+                    if not self.manifest.isUpToDate(page[0], page[1])]
+        self.pending_pages = plan
+        self.total_pages += len(plan)
+        jobs = self.system.options.jobs
+        if jobs > 1 and len(plan) > 1:
+            self._writeInParallel(jobs)
+        else:
+            for ob, filename, pclass in plan:
+                self._writePage(ob, filename, pclass)
+        # Docstrings whose full rendering was skipped are not needed either.
+        self.system.parsed_docstrings.clear()
+        if self.manifest is not None:
+            self.manifest.save()
 
     def writeModuleIndex(self, system):
-        import time
-        for i, pclass in enumerate(summary.summarypages):
-            system.msg('html', 'starting ' + pclass.__name__ + ' ...', nonl=True)
-            T = time.time()
-            page = pclass(system)
+        stats = system.stats
+        for pclass in summary.summarypages:
+            system.msg('html', 'writing ' + pclass.__name__, thresh=1)
             f = open(os.path.join(self.base, pclass.filename), 'wb')
-            flattenToFile(f, page)
+            out = _TimedFile(f, stats)
+            with stats.span('flattening'):
+                flattenToFile(out, pclass(system))
+            out.flush()
+            stats.count('pages')
             f.close()
-            system.msg('html', "took %fs"%(time.time() - T), wantsnl=False)
+
+    def planPages(self, obs, functionpages=False):
+        """Return the pages to write for C{obs} and everything they
+        contain, as a list of C{(object, filename, page class)} triples in
+        the order they should be written.
+        """
+        plan = []
+        PARENT_PAGE = model.DocLocation.PARENT_PAGE
+        stack = list(reversed(obs))
+        while stack:
+            ob = stack.pop()
+            if not ob.isVisible:
+                continue
+            if functionpages or ob.documentation_location is not PARENT_PAGE:
+                plan.append((ob, link(ob), pageClassFor(ob)))
+            stack.extend(reversed(ob.orderedcontents))
+        return plan
 
     def writeDocsFor(self, ob, functionpages):
-        if not ob.isVisible:
-            return
-        isfunc = ob.documentation_location is model.DocLocation.PARENT_PAGE
-        if (isfunc and functionpages) or not isfunc:
-            if self.dry_run:
-                self.total_pages += 1
-            else:
-                f = open(os.path.join(self.base, link(ob)), 'wb')
-                self.writeDocsForOne(ob, f)
-                f.close()
-        for o in ob.orderedcontents:
-            self.writeDocsFor(o, functionpages)
-
-    def writeDocsForOne(self, ob, fobj):
-        if not ob.isVisible:
+        for page in self.planPages([ob], functionpages):
+            self._writePage(*page)
+
+    def _writePage(self, ob, filename, pclass):
+        f = open(os.path.join(self.base, filename), 'wb')
+        if self.manifest is not None:
+            self.manifest.startPage(ob, filename)
+        self.writeDocsForOne(ob, f, pclass)
+        if self.manifest is not None:
+            self.manifest.finishPage(ob, filename)
+        f.close()
+
+    def _writeInParallel(self, jobs):
+        """Render the pending pages in C{jobs} forked worker processes.
+
+        Every worker inherits a copy of the processed system, so only the
+        pages to write and what the workers learnt while writing them (the
+        docstrings with errors, the manifest entries and the statistics,
+        profiles included) cross process boundaries.
+        """
+        global _worker_writer
+        try:
+            context = multiprocessing.get_context('fork')
+        except AttributeError: # Python 2 always forks.
+            context = multiprocessing
+        except ValueError:
+            self.system.msg(
+                'html', 'cannot fork on this platform, writing serially',
+                thresh=-1, once=True)
+            for page in self.pending_pages:
+                self._writePage(*page)
             return
-        # brrrrrrr!
-        d = pages.__dict__
-        for c in ob.__class__.__mro__:
-            n = c.__name__ + 'Page'
-            if n in d:
-                pclass = d[n]
-                break
-        else:
-            pclass = pages.CommonPage
+        # Workers are told which pages to write by index: pickling the
+        # pages themselves would drag the whole system along.
+        total = len(self.pending_pages)
+        chunksize = max(1, min(100, total // (jobs * 8)))
+        chunks = [(i, min(i + chunksize, total))
+                  for i in range(0, total, chunksize)]
+        _worker_writer = self
+        self.report_progress = False
+        pool = context.Pool(jobs)
+        try:
+            results = pool.imap(_writePagesInWorker, chunks)
+            for chunk, result in zip(chunks, results):
+                problems, entries, stats, profiles = result
+                self.system.stats.merge(stats, profiles)
+                for fn in problems:
+                    if fn not in self.system.epytextproblems:
+                        self.system.epytextproblems.append(fn)
+                if self.manifest is not None:
+                    self.manifest.pages.update(entries)
+                self.written_pages += chunk[1] - chunk[0]
+                self.system.progress(
+                    'html', self.written_pages, self.total_pages,
+                    'pages written')
+        finally:
+            pool.terminate()
+            pool.join()
+            self.report_progress = True
+            _worker_writer = None
+
+    def writeDocsForOne(self, ob, fobj, pclass=None):
+        if pclass is None:
+            if not ob.isVisible:
+                return
+            pclass = pageClassFor(ob)
         self.system.msg('html', str(ob), thresh=1)
-        page = pclass(ob)
-        self.written_pages += 1
-        self.system.progress('html', self.written_pages, self.total_pages, 'pages written')
-        flattenToFile(fobj, page)
+        # Table ids only need to be unique within a page; restarting them
+        # keeps every page independent of what was rendered before it.
+        pages.ChildTable.last_id = 0
+        if self.report_progress:
+            self.written_pages += 1
+            self.system.progress('html', self.written_pages, self.total_pages, 'pages written')
+        stats = self.system.stats
+        out = _TimedFile(fobj, stats)
+        with stats.span('flattening'):
+            flattenToFile(out, pclass(ob))
+        out.flush()
+        stats.count('pages')
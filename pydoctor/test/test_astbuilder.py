@@ -1,8 +1,10 @@
 from __future__ import print_function
 
+import ast
 import textwrap
 
 import astor
+import pytest
 
 from pydoctor import astbuilder, model
 from pydoctor.epydoc2stan import get_parsed_type
@@ -488,6 +490,74 @@ def test_inline_docstring_instancevar():
     assert f.privacyClass is model.PrivacyClass.VISIBLE
     assert f.kind == 'Instance Variable'
 
+def test_skim_function_bodies():
+    """
+    When skimming function bodies, the instance variables of methods are
+    found like always, but the functions and classes defined in functions
+    are left out.
+    """
+    src = '''
+    class C:
+        def __init__(self, value):
+            self.a = 1
+            """inline doc for a"""
+            x = 2
+            if value:
+                self.b = [value]
+                """inline doc for b"""
+            else:
+                try:
+                    self.c = value
+                except ValueError:
+                    self.d = None
+            def helper():
+                self.e = 3
+            class Nested:
+                pass
+    def f():
+        def inner():
+            pass
+        class Local:
+            pass
+    '''
+    full = fromText(src, modname='test')
+    system = model.System()
+    system.options.skimfunctionbodies = True
+    skimmed = fromText(src, modname='test', system=system)
+    def describe(mod):
+        return dict(
+            (o.fullName(), (o.kind, o.docstring, o.linenumber,
+                            o.annotation and astor.to_source(o.annotation)))
+            for o in mod.system.objectsOfType(model.Attribute))
+    assert describe(skimmed) == describe(full)
+    assert sorted(skimmed.contents['C'].contents) == [
+        '__init__', 'a', 'b', 'c', 'd']
+    assert sorted(o.fullName() for o in full.system.orderedallobjects
+                  if o.fullName() not in system.allobjects) == [
+        'test.C.__init__.Nested', 'test.C.__init__.helper', 'test.f.Local',
+        'test.f.inner']
+
+def test_skim_function_bodies_other_statements():
+    """
+    Skimming steps over the statements that cannot define instance
+    variables.
+    """
+    system = model.System()
+    system.options.skimfunctionbodies = True
+    mod = fromText('''
+    class C:
+        def f(self, items):
+            for item in items:
+                if item:
+                    self.a = item
+            while False:
+                pass
+            with open(items) as f:
+                self.b = f
+            return self.a
+    ''', modname='test', system=system)
+    assert sorted(mod.contents['C'].contents) == ['a', 'b', 'f']
+
 @py3only
 def test_inline_docstring_annotated_instancevar():
     mod = fromText('''
@@ -756,3 +826,37 @@ def test_type_from_attrib():
     assert type2str(C.contents['b'].annotation) == 'int'
     assert type2str(C.contents['c'].annotation) == 'C'
     assert type2str(C.contents['d'].annotation) == 'bool'
+
+def test_ast_cache(tmpdir, monkeypatch):
+    """
+    An unchanged file is loaded from the cache without being parsed again,
+    while a changed file is parsed afresh.
+    """
+    src = tmpdir.join('mod.py')
+    src.write('def f():\n    """Docstring."""\n')
+    cache = astbuilder.ASTCache(str(tmpdir.join('cache')))
+    tree = cache.parseFile(str(src))
+    assert isinstance(tree.body[0], ast.FunctionDef)
+
+    def parse(buf):
+        raise AssertionError("parsed %r again" % (buf,))
+    monkeypatch.setattr(astbuilder, 'parse', parse)
+    cached = cache.parseFile(str(src))
+    assert astor.to_source(cached) == astor.to_source(tree)
+
+    monkeypatch.undo()
+    src.write('class C:\n    pass\n')
+    tree = cache.parseFile(str(src))
+    assert isinstance(tree.body[0], ast.ClassDef)
+
+def test_ast_cache_syntax_error(tmpdir):
+    """
+    Syntax errors are not cached; they propagate to the caller every time.
+    """
+    src = tmpdir.join('mod.py')
+    src.write('def f(:\n')
+    cache = astbuilder.ASTCache(str(tmpdir.join('cache')))
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            cache.parseFile(str(src))
+    assert tmpdir.join('cache').listdir() == []
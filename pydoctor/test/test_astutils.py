@@ -0,0 +1,45 @@
+"""
+Tests for L{pydoctor.astutils}.
+"""
+from __future__ import print_function
+
+import ast
+
+import astor
+import pytest
+
+from pydoctor.astutils import node2source
+
+
+def expression(source):
+    return ast.parse(source, mode='eval').body
+
+
+@pytest.mark.parametrize('source', [
+    # Written out directly.
+    'a', 'a.b.c', 'f()', 'f(a, *b, k=1, **kw)', 'a.b(c).d[e]',
+    'Dict[str, List[int]]', 'Tuple[int, ...]', 'Callable[[int], None]',
+    'None', 'True', '1', '1.5', '"string"', '"multi\\nline"', "b'bytes'",
+    'u"unicode"', '[1, "a", None]', '(a,)', '(a, b)', '()',
+    'f(True, 0, "s")',
+    # Left to astor.
+    '-1', 'f(-1)', 'a + b', 'a if b else c', 'lambda x: x', 'not a',
+    '{"a": 1}', 'x[1:2]', 'x[a,]', '(a or b).c', '"a\\rb"',
+    'f(%s)' % ', '.join(['argument%d' % (i,) for i in range(20)]),
+    ])
+def test_same_as_astor(source):
+    """
+    L{node2source} writes out expressions the way astor does.
+    """
+    assert node2source(expression(source)) == \
+           astor.to_source(expression(source)).strip()
+
+
+def test_remembered():
+    """
+    The source of a node is only worked out once.
+    """
+    node = expression('a.b(c)')
+    assert node2source(node) == 'a.b(c)'
+    node.func.attr = 'changed'
+    assert node2source(node) == 'a.b(c)'
@@ -0,0 +1,42 @@
+"""
+Tests for the benchmark harness.
+"""
+from __future__ import print_function
+
+import json
+
+import pytest
+
+from pydoctor.benchmarks import run, synthetic
+
+
+@pytest.mark.parametrize('docformat', ['epytext', 'restructuredtext'])
+def test_runBenchmark(tmpdir, docformat):
+    """
+    Every stage of documenting the synthetic package is timed.
+    """
+    shape = synthetic.PackageShape(
+        modules=3, classes=2, methods=2, functions=1, docformat=docformat)
+    results = run.runBenchmark(shape, str(tmpdir))
+    assert [s['name'] for s in results['stages']] == [
+        'generate', 'addPackage', 'process', 'writeModuleIndex',
+        'writeIndividualFiles', 'SphinxInventoryWriter.generate']
+    for stage in results['stages']:
+        assert stage['seconds'] >= 0
+    assert results['shape'] == shape.asDict()
+    # The package, its __init__ and for each module: the module, its
+    # function, and two classes with two methods and an attribute each.
+    assert results['objects'] == 2 + 3 * (1 + 1 + 2 * 4)
+    assert tmpdir.join('html', 'synthetic.mod0.Class0_1.html').check()
+    assert tmpdir.join('html', 'objects.inv').check()
+
+
+def test_main(tmpdir):
+    """
+    The results are written as JSON.
+    """
+    output = tmpdir.join('results.json')
+    assert run.main(['--modules', '2', '--output', str(output)]) == 0
+    results = json.loads(output.read())
+    assert results['shape']['modules'] == 2
+    assert results['total_seconds'] > 0
@@ -1,8 +1,11 @@
 from __future__ import print_function
 
+import json
+import os
 import sys
 
-from pydoctor import driver
+from pydoctor import driver, epydoc2stan
+from pydoctor.test.test_packages import testpackages
 from twisted.python.compat import NativeStringIO
 
 from . import py2only, py3only
@@ -69,3 +72,116 @@ def test_cache_disabled_by_default():
     parser = driver.getparser()
     (options, _) = parser.parse_args([])
     assert not options.enable_intersphinx_cache
+
+
+def test_cache_dir(tmpdir):
+    """
+    The --cache-dir option stores parsed modules in the given directory.
+    """
+    cachedir = tmpdir.join('cache')
+    driver.main([
+        '--testing', '--quiet', '--cache-dir', str(cachedir),
+        '--add-package', os.path.join(testpackages, 'basic'),
+        ])
+    assert len(cachedir.listdir()) > 0
+
+
+def test_stdlib_modules(tmpdir):
+    """
+    The --stdlib-modules option reads the names of the standard library
+    modules from a file.
+    """
+    path = tmpdir.join('stdlib.txt')
+    path.write('os\nos.path\n\nxml\n')
+    options, args = driver.parse_args(['--stdlib-modules', str(path)])
+    assert options.stdlibmodules == str(path)
+    assert epydoc2stan.read_stdlib_modules(str(path)) == frozenset(
+        ['os', 'os.path', 'xml'])
+
+
+def test_stats_json(tmpdir):
+    """
+    The --stats-json option writes the time spent in each stage, and
+    --profile-stage profiles a stage next to it.
+    """
+    path = tmpdir.join('stats.json')
+    driver.main([
+        '--testing', '--quiet', '--stats-json', str(path),
+        '--profile-stage', 'visiting',
+        '--add-package', os.path.join(testpackages, 'basic'),
+        ])
+    data = json.loads(path.read())
+    assert data['counters']['modules'] > 0
+    assert set(data['spans']) >= set(['discovery', 'parsing', 'visiting'])
+    assert tmpdir.join('visiting.prof').check()
+
+
+def test_stats_json_jobs(tmpdir):
+    """
+    With --jobs, the statistics and profiles of the worker processes that
+    parse modules and write pages are added to those of the run.
+    """
+    path = tmpdir.join('stats.json')
+    driver.main([
+        '--quiet', '--jobs', '2', '--stats-json', str(path),
+        '--profile-stage', 'parsing', '--profile-stage', 'flattening',
+        '--html-output', str(tmpdir.join('html')),
+        '--add-package', os.path.join(testpackages, 'basic'),
+        ])
+    data = json.loads(path.read())
+    assert data['counters']['pages'] > 1
+    assert data['spans']['parsing']['calls'] > 1
+    assert tmpdir.join('parsing.prof').check()
+    assert tmpdir.join('flattening.prof').check()
+
+
+def test_privacy_rules():
+    """
+    The --privacy option adds privacy rules to the system, and rejects
+    rules it cannot parse.
+    """
+    options, args = driver.parse_args([
+        '--privacy', 'HIDDEN:basic.mod.*', '--privacy', 'private:basic.mod.C'])
+    assert options.privacy == ['HIDDEN:basic.mod.*', 'private:basic.mod.C']
+    err = geterrtext('--privacy', 'SECRET:basic',
+                     '--add-package', os.path.join(testpackages, 'basic'))
+    assert 'invalid privacy rule' in err
+
+
+def test_lazy_subject(tmpdir):
+    """
+    With --lazy, --html-subject only writes the pages of the subject, after
+    processing just what it needs.
+    """
+    driver.main([
+        '--quiet', '--lazy', '--html-subject', 'basic.mod.C',
+        '--html-output', str(tmpdir),
+        '--add-package', os.path.join(testpackages, 'basic'),
+        ])
+    assert tmpdir.join('basic.mod.C.html').check()
+    assert not tmpdir.join('basic.mod.html').check()
+
+
+def test_save_and_load_model(tmpdir):
+    """
+    The documentation generated from a saved model is the same as the one
+    generated while processing.
+    """
+    model = str(tmpdir.join('basic.model'))
+    common = ['--quiet', '--buildtime', '2020-01-01 00:00:00']
+    driver.main(common + [
+        '--save-model', model, '--make-html',
+        '--html-output', str(tmpdir.join('processed')),
+        '--add-package', os.path.join(testpackages, 'basic'),
+        ])
+    driver.main(common + [
+        '--load-model', model,
+        '--html-output', str(tmpdir.join('loaded')),
+        ])
+    processed = tmpdir.join('processed')
+    loaded = tmpdir.join('loaded')
+    names = sorted(p.basename for p in processed.listdir())
+    assert sorted(p.basename for p in loaded.listdir()) == names
+    for name in names:
+        assert loaded.join(name).read_binary() == \
+               processed.join(name).read_binary(), name
@@ -74,6 +74,40 @@ def test_summary():
     assert u'No summary' == get_summary('no_summary')
 
 
+def test_docstring_parsed_once(monkeypatch):
+    """
+    Rendering a docstring as a summary and then in full reuses the parse
+    done when its fields were extracted, which is let go of once the full
+    docstring has been rendered.
+    """
+    mod = fromText('''
+    class C(object):
+        """
+        Lorem L{C}.
+
+        @ivar a: An attribute.
+        """
+    ''')
+    C = mod.contents['C']
+    assert 'a' in C.contents
+    parse = epydoc2stan.get_parser('epytext')[0]
+    parsed = []
+    def counting_parse(doc, errs):
+        parsed.append(doc)
+        return parse(doc, errs)
+    monkeypatch.setattr(
+        epydoc2stan, 'get_parser', lambda formatname: (counting_parse, None))
+    summary = flatten(epydoc2stan.doc2stan(C, summary=True))
+    assert summary == flatten(epydoc2stan.doc2stan(C, summary=True))
+    full = flatten(epydoc2stan.doc2stan(C))
+    assert parsed == []
+    assert 'C.html' in full and 'C.html' in summary
+    assert 'An attribute' not in summary
+    assert mod.system.parsed_docstrings == {}
+    assert full == flatten(epydoc2stan.doc2stan(C))
+    assert len(parsed) == 1
+
+
 def test_EpydocLinker_look_for_intersphinx_no_link():
     """
     Return None if inventory had no link for our markup.
@@ -189,3 +223,96 @@ def test_EpydocLinker_translate_identifier_xref_intersphinx_link_not_found():
         )
 
     assert expected == stdout.getvalue()
+
+
+def test_EpydocLinker_resolve_identifier_xref_other_modules(capsys):
+    """
+    As a last resort, a name is looked up in every module of the system.
+    If it is found in more than one, the reference is reported as
+    ambiguous.
+    """
+    system = model.System()
+    fromText('''
+    class C:
+        pass
+    class D:
+        pass
+    ''', modname='m1', system=system)
+    fromText('''
+    class C:
+        pass
+    ''', modname='m2', system=system)
+    m3 = fromText('''
+    def f():
+        pass
+    ''', modname='m3', system=system)
+    capsys.readouterr()
+    sut = epydoc2stan._EpydocLinker(m3.contents['f'])
+    assert sut.resolve_identifier_xref('D') == 'm1.D.html'
+    assert sut.resolve_identifier_xref('C') is None
+    assert capsys.readouterr().out == (
+        'm3.f:2 ambiguous ref to C, could be m1.C, m2.C\n')
+
+
+def test_EpydocLinker_resolve_identifier_xref_cached(capsys, monkeypatch):
+    """
+    A reference is resolved once per scope.  Functions and attributes share
+    the resolutions of their parent, but any problems are still reported
+    for each of them.
+    """
+    mod = fromText('''
+    import external as ext
+    class C:
+        pass
+    def f():
+        pass
+    def g():
+        pass
+    ''', modname='m')
+    capsys.readouterr()
+    resolved = []
+    resolve = epydoc2stan._EpydocLinker._resolve
+    def counting_resolve(self, scope, fullID, problems):
+        resolved.append((scope, fullID))
+        return resolve(self, scope, fullID, problems)
+    monkeypatch.setattr(epydoc2stan._EpydocLinker, '_resolve', counting_resolve)
+    for name in 'f', 'g':
+        sut = epydoc2stan._EpydocLinker(mod.contents[name])
+        assert sut.resolve_identifier_xref('C') == 'm.C.html'
+        assert sut.resolve_identifier_xref('ext.X') is None
+    assert resolved == [(mod, 'C'), (mod, 'ext.X')]
+    assert capsys.readouterr().out == (
+        "m.f:5 invalid ref to 'ext.X' resolved as 'external.X'\n"
+        "m.g:7 invalid ref to 'ext.X' resolved as 'external.X'\n")
+
+
+def test_stdlib_doc_link_for_name():
+    """
+    Names in standard library modules link to the documentation of the
+    module, builtins to the pages describing them.
+    """
+    url = epydoc2stan.STDLIB_URL
+    link = epydoc2stan.stdlib_doc_link_for_name
+    assert link('os.path.join') == url + 'os.path.html#os.path.join'
+    assert link('xml.dom.minidom') == url + 'xml.dom.minidom.html#xml.dom.minidom'
+    assert link('sys.argv') == url + 'sys.html#sys.argv'
+    assert link('pydoctor.model') is None
+    modules = frozenset(['pydoctor'])
+    assert link('pydoctor.model', modules) == url + 'pydoctor.html#pydoctor.model'
+    assert link('os.path.join', modules) is None
+
+
+def test_cached_stdlib_modules(tmpdir, monkeypatch):
+    """
+    The names of the standard library modules are only searched for once
+    for each cache directory.
+    """
+    found = epydoc2stan.find_stdlib_modules()
+    assert 'os.path' in found
+    assert 'xml.dom.minidom' in found
+    assert 'sys' in found
+    assert epydoc2stan.cached_stdlib_modules(str(tmpdir)) == found
+    def fail():
+        raise AssertionError("searched again")
+    monkeypatch.setattr(epydoc2stan, 'find_stdlib_modules', fail)
+    assert epydoc2stan.cached_stdlib_modules(str(tmpdir)) == found
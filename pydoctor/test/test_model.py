@@ -5,8 +5,11 @@ from __future__ import print_function
 
 import zlib
 
+import pytest
+
 from pydoctor import model, sphinx
 from pydoctor.driver import parse_args
+from pydoctor.test.test_astbuilder import fromText
 
 
 class FakeOptions(object):
@@ -122,3 +125,370 @@ def test_fetchIntersphinxInventories_content():
         'file:///twisted/tm.html' ==
         sut.intersphinx.getLink('twisted.package')
         )
+
+
+def test_fullName_reparent():
+    """
+    The full names of an object and everything below it follow the object
+    when it is moved.
+    """
+    mod = fromText('''
+    class C:
+        def f(self):
+            pass
+    class D:
+        pass
+    ''', modname='mod')
+    system = mod.system
+    C = mod.contents['C']
+    f = C.contents['f']
+    assert f.fullName() == 'mod.C.f'
+    C.reparent(mod.contents['D'], 'E')
+    assert C.fullName() == 'mod.D.E'
+    assert f.fullName() == 'mod.D.E.f'
+    assert system.allobjects['mod.D.E.f'] is f
+    assert 'mod.C.f' not in system.allobjects
+
+
+def test_fullName_duplicate():
+    """
+    When a definition is replaced by a later one, the full names of the
+    earlier definition and everything below it are renamed.
+    """
+    mod = fromText('''
+    class C:
+        def f(self):
+            pass
+    class C:
+        pass
+    ''', modname='mod')
+    system = mod.system
+    C = system.allobjects['mod.C']
+    assert 'f' not in C.contents
+    f = system.allobjects['mod.C 0.f']
+    assert f.fullName() == 'mod.C 0.f'
+    assert f.parent.fullName() == 'mod.C 0'
+
+
+def test_function_attribute_compact():
+    """
+    Functions and attributes have no instance dictionary, and only get
+    containers of their own when their first child is added.
+    """
+    mod = fromText('''
+    def f():
+        pass
+    x = 1
+    ''')
+    system = mod.system
+    f = mod.contents['f']
+    x = mod.contents['x']
+    for o in f, x:
+        assert not hasattr(o, '__dict__')
+        assert o.contents == {}
+        assert list(o.orderedcontents) == []
+    a = system.Attribute(system, 'a', None, f)
+    system.addObject(a)
+    assert f.contents == {'a': a}
+    assert f.orderedcontents == [a]
+    assert a.fullName() == '<test>.f.a'
+    assert x.contents == {}
+
+
+def test_objectsOfType():
+    """
+    objectsOfType() finds the instances of a class and its subclasses, in
+    the order they were added to the system.
+    """
+    class SubClass(model.Class):
+        pass
+    system = model.System()
+    mod = model.Module(system, 'mod', None)
+    system.addObject(mod)
+    added = []
+    for i, cls in enumerate([model.Class, SubClass, model.Function,
+                             model.Class, SubClass]):
+        ob = cls(system, 'o%d' % i, None, mod)
+        system.addObject(ob)
+        added.append(ob)
+    classes = [ob for ob in added if isinstance(ob, model.Class)]
+    assert list(system.objectsOfType(model.Class)) == classes
+    assert list(system.objectsOfType(SubClass)) == [added[1], added[4]]
+    assert list(system.objectsOfType(model.Module)) == [mod]
+    assert list(system.objectsOfType(model.Package)) == []
+    assert list(system.objectsOfType(model.Documentable)) == [mod] + added
+
+
+def test_privacyClass_inherits_hidden():
+    """
+    Everything in a hidden object is hidden, without the system's rules
+    being asked about it, and the privacy of objects is classified again
+    after the objects of the system change.
+    """
+    asked = []
+    class HidingSystem(model.System):
+        def privacyClass(self, ob):
+            asked.append(ob.name)
+            if ob.name == 'hidden':
+                return model.PrivacyClass.HIDDEN
+            return model.System.privacyClass(self, ob)
+    system = HidingSystem()
+    mod = model.Module(system, 'mod', None)
+    system.addObject(mod)
+    hidden = model.Class(system, 'hidden', None, mod)
+    system.addObject(hidden)
+    method = model.Function(system, 'method', None, hidden)
+    system.addObject(method)
+    private = model.Class(system, '_private', None, mod)
+    system.addObject(private)
+
+    assert method.privacyClass is model.PrivacyClass.HIDDEN
+    assert not hidden.isVisible
+    assert mod.privacyClass is model.PrivacyClass.VISIBLE
+    assert private.privacyClass is model.PrivacyClass.PRIVATE
+    assert sorted(asked) == ['_private', 'hidden', 'mod']
+
+    del asked[:]
+    method.reparent(private, 'method')
+    assert method.privacyClass is model.PrivacyClass.VISIBLE
+    assert 'method' in asked
+
+
+def test_privacy_rules():
+    """
+    Privacy rules match fullNames with glob patterns and the last matching
+    rule wins over the earlier ones and the default privacy.
+    """
+    mod = fromText('''
+    class Public:
+        def method(self):
+            pass
+    class _Private:
+        def method(self):
+            pass
+    ''', modname='pkg')
+    system = mod.system
+    public = mod.contents['Public']
+    private = mod.contents['_Private']
+    assert private.privacyClass is model.PrivacyClass.PRIVATE
+
+    system.addPrivacyRule(model.PrivacyClass.HIDDEN, 'pkg.*.meth?d')
+    system.addPrivacyRule(model.PrivacyClass.VISIBLE, 'pkg._Private*')
+    assert private.privacyClass is model.PrivacyClass.VISIBLE
+    assert private.contents['method'].privacyClass is \
+        model.PrivacyClass.VISIBLE
+    assert public.privacyClass is model.PrivacyClass.VISIBLE
+    assert not public.contents['method'].isVisible
+
+    system.addPrivacyRule(model.PrivacyClass.PRIVATE, 'pkg.Public')
+    assert public.privacyClass is model.PrivacyClass.PRIVATE
+    assert mod.privacyClass is model.PrivacyClass.VISIBLE
+
+
+def test_compilePrivacyRules_many():
+    """
+    Hundreds of rules can be compiled, and the last matching one still
+    wins.
+    """
+    rules = [(model.PrivacyClass.PRIVATE, 'mod.f%d' % (i,))
+             for i in range(250)]
+    rules.append((model.PrivacyClass.HIDDEN, 'mod.f1?'))
+    rules.append((model.PrivacyClass.VISIBLE, 'mod.f12'))
+    matcher = model.compilePrivacyRules(rules)
+    assert matcher('mod.f0') is model.PrivacyClass.PRIVATE
+    assert matcher('mod.f12') is model.PrivacyClass.VISIBLE
+    assert matcher('mod.f13') is model.PrivacyClass.HIDDEN
+    assert matcher('mod.f100') is model.PrivacyClass.PRIVATE
+    assert matcher('mod.f249') is model.PrivacyClass.PRIVATE
+    assert matcher('mod.f250') is None
+
+
+@pytest.mark.parametrize('text', ['PRIVATE', 'SECRET:a.b', 'hidden:'])
+def test_parsePrivacyRule_invalid(text):
+    with pytest.raises(ValueError):
+        model.parsePrivacyRule(text)
+
+
+def test_parsePrivacyRule():
+    assert model.parsePrivacyRule('hidden: a.*.b') == (
+        model.PrivacyClass.HIDDEN, 'a.*.b')
+
+
+def test_classHierarchy():
+    """
+    The class hierarchy index finds what each class inherits and which
+    subclasses override its names, also through diamonds.
+    """
+    mod = fromText('''
+    class A:
+        def f(self): pass
+        def g(self): pass
+        def h(self): pass
+    class B(A):
+        def f(self): pass
+    class C(A):
+        def g(self): pass
+    class D(B, C):
+        def k(self): pass
+    class E(D):
+        def f(self): pass
+    ''')
+    A, B, C, D, E = [mod.contents[name] for name in 'ABCDE']
+    hierarchy = mod.system.classHierarchy()
+    assert hierarchy is mod.system.classHierarchy()
+
+    assert hierarchy.linearization(E) == [E, D, B, C, A]
+    inherited = hierarchy.inherited(D)
+    assert inherited['f'] is B.contents['f']
+    assert inherited['g'] is C.contents['g']
+    assert 'k' not in inherited
+
+    overriddenIn = hierarchy.overriddenIn(A)
+    assert overriddenIn['f'] == [B, E]
+    assert overriddenIn['g'] == [C]
+    assert 'h' not in overriddenIn
+
+    def names(attrs):
+        return [o.name for o in attrs]
+    assert [(path, names(attrs)) for path, attrs in hierarchy.baseLists(D)] == [
+        ((D,), ['k']),
+        ((B, D), ['f']),
+        ((A, B, D), ['g', 'h']),
+        ((C, D), ['g']),
+        ((A, C, D), ['f', 'h']),
+        ]
+
+
+def test_mro():
+    """
+    The MRO of a class is its C3 linearization, without the bases that are
+    not in the system, and it is worked out again when bases change.
+    """
+    mod = fromText('''
+    from external import Unknown
+    class O: pass
+    class A(O): pass
+    class B(O): pass
+    class C(A, B): pass
+    class D(B, A): pass
+    class E(C, Unknown): pass
+    ''')
+    O, A, B, C, D, E = [mod.contents[name] for name in 'OABCDE']
+    assert C.mro == [C, A, B, O]
+    assert D.mro == [D, B, A, O]
+    assert E.mro == [E, C, A, B, O]
+    assert E.mro is E.mro
+    assert E.allbases() == [C, A, B, O]
+    assert list(E.allbases(include_self=True)) == E.mro
+
+    # C and D disagree about the order of A and B, so there is no C3
+    # linearization; a depth first walk is used instead.
+    F = mod.system.Class(mod.system, 'F', None, mod)
+    mod.system.addObject(F)
+    F.baseobjects = [C, D]
+    assert F.mro == [F, C, A, B, O, D]
+
+    B.baseobjects = []
+    O.subclasses.remove(B)
+    assert E.mro == [E, C, A, O, B]
+
+
+def test_stronglyConnectedComponents():
+    """
+    Components come after the components they have edges to, and long
+    chains do not hit the recursion limit.
+    """
+    edges = {'a': ['b'], 'b': ['c', 'd'], 'c': ['b'], 'd': []}
+    components = model.stronglyConnectedComponents('abcd', edges.get)
+    assert [sorted(c) for c in components] == [['d'], ['b', 'c'], ['a']]
+
+    n = 10000
+    chain = dict((i, [i + 1]) for i in range(n))
+    components = model.stronglyConnectedComponents(
+        range(n + 1), lambda i: chain.get(i, ()))
+    assert list(components) == [[i] for i in reversed(range(n + 1))]
+
+
+def test_stronglyConnectedComponents_lazy():
+    """
+    Components are produced before the rest of the graph is walked.
+    """
+    edges = {'a': ['b'], 'b': [], 'c': ['a']}
+    walked = []
+    def edgesOf(node):
+        walked.append(node)
+        return edges[node]
+    components = model.stronglyConnectedComponents('abc', edgesOf)
+    assert next(components) == ['b']
+    assert walked == ['a', 'b']
+    assert list(components) == [['a'], ['c']]
+    assert walked == ['a', 'b', 'c']
+
+
+def test_processingOrder(tmpdir):
+    """
+    Modules are processed after the modules they import, and the modules of
+    an import cycle in the order they were added.
+    """
+    pkg = tmpdir.mkdir('pkg')
+    pkg.join('__init__.py').write('')
+    pkg.join('a.py').write('from pkg.b import B\nclass A(B): pass\n')
+    pkg.join('b.py').write('import pkg.c\nclass B: pass\n')
+    pkg.join('c.py').write('if True:\n    from pkg import d\n')
+    pkg.join('d.py').write('from pkg.c import x\ndef f():\n    import pkg.a\n')
+    system = model.System()
+    system.addPackage(str(pkg))
+    order = [mod.fullName() for mod in system.processingOrder()]
+    assert order == ['pkg.__init__', 'pkg.c', 'pkg.d', 'pkg.b', 'pkg.a']
+    system.parsed_modules.clear()
+
+    processed = []
+    parsed = []
+    processModule = system.processModule
+    def recordingProcessModule(mod):
+        processed.append((mod.fullName(), list(system.processing_modules)))
+        parsed.append(len(system.parsed_modules))
+        processModule(mod)
+    system.processModule = recordingProcessModule
+    system.process()
+    # Only the c <-> d cycle makes processing a module process another.
+    assert processed == [
+        ('pkg.__init__', []),
+        ('pkg.c', []),
+        ('pkg.d', ['pkg.c']),
+        ('pkg.b', []),
+        ('pkg.a', []),
+        ]
+    # Modules are processed as soon as the modules they import are, and
+    # their ASTs are dropped once they are processed.
+    assert parsed == [1, 4, 3, 2, 1]
+    assert system.parsed_modules == {}
+    assert system.allobjects['pkg.a.A'].baseobjects == [
+        system.allobjects['pkg.b.B']]
+
+
+def test_process_subject(tmpdir):
+    """
+    Processing the modules of a subject also processes the modules they
+    import, but nothing else.
+    """
+    pkg = tmpdir.mkdir('pkg')
+    pkg.join('__init__.py').write('')
+    pkg.join('a.py').write('from pkg.b import B\nclass A(B): pass\n')
+    pkg.join('b.py').write('class B: pass\n')
+    pkg.join('c.py').write('from pkg.a import A\nclass C(A): pass\n')
+    system = model.System()
+    system.addPackage(str(pkg))
+    modules = system.subjectModules('pkg.a.A')
+    assert [mod.fullName() for mod in modules] == ['pkg.a']
+    system.process(modules)
+    assert system.allobjects['pkg.a'].state is model.ProcessingState.PROCESSED
+    assert system.allobjects['pkg.b'].state is model.ProcessingState.PROCESSED
+    assert system.allobjects['pkg.c'].state is \
+        model.ProcessingState.UNPROCESSED
+    assert system.allobjects['pkg.a.A'].baseobjects == [
+        system.allobjects['pkg.b.B']]
+
+    assert sorted(mod.fullName() for mod in system.subjectModules('pkg')) == [
+        'pkg.__init__', 'pkg.a', 'pkg.b', 'pkg.c']
+    assert system.subjectModules('nothing.here') == []
@@ -6,9 +6,10 @@ from pydoctor import model
 
 testpackages = os.path.join(os.path.dirname(__file__), 'testpackages')
 
-def processPackage(packname, systemcls=model.System):
+def processPackage(packname, systemcls=model.System, jobs=1):
     testpackage = os.path.join(testpackages, packname)
     system = systemcls()
+    system.options.jobs = jobs
     system.packages.append(testpackage)
     system.addPackage(testpackage)
     system.process()
@@ -49,3 +50,33 @@ def test_allgames():
     # InSourceAll is not moved into mod2, but NotInSourceAll is.
     assert 'InSourceAll' in system.allobjects['allgames.mod1'].contents
     assert 'NotInSourceAll' in system.allobjects['allgames.mod2'].contents
+
+def test_parallel_parsing(tmpdir):
+    """
+    Parsing modules in worker processes up front gives the same system as
+    parsing them one at a time, including for modules that do not parse.
+    """
+    def summarize(system):
+        return sorted(
+            (name, o.kind, o.docstring, getattr(o, 'linenumber', None))
+            for name, o in system.allobjects.items())
+    for packname in ('basic', 'allgames', 'importingfrompackage'):
+        serial = processPackage(packname)
+        parallel = processPackage(packname, jobs=3)
+        assert summarize(serial) == summarize(parallel)
+
+    tmpdir.join('__init__.py').write('')
+    tmpdir.join('good.py').write('"""Good."""\n')
+    tmpdir.join('bad.py').write('def bad(:\n')
+    warnings = []
+    for jobs in (1, 2):
+        system = model.System()
+        system.options.jobs = jobs
+        system.addPackage(str(tmpdir))
+        system.process()
+        assert system.allobjects[tmpdir.basename + '.good'].docstring == 'Good.'
+        assert system.parsed_modules == {}
+        warnings.append(system.warnings)
+    serial, parallel = warnings
+    assert serial['cannot parse'] == [('<None>', str(tmpdir.join('bad.py')))]
+    assert serial == parallel
@@ -0,0 +1,163 @@
+"""
+Tests for L{pydoctor.snapshot}.
+"""
+from __future__ import print_function
+
+import zlib
+
+import astor
+import pytest
+
+from pydoctor import epydoc2stan, model, snapshot, zopeinterface
+from pydoctor.epydoc.markup import flatten
+from pydoctor.test.test_astbuilder import fromText
+from pydoctor.test.test_packages import processPackage
+
+
+def roundTrip(system, tmpdir):
+    path = str(tmpdir.join('model'))
+    snapshot.save(system, path)
+    loaded = type(system)()
+    snapshot.restoreSystem(loaded, snapshot.load(path))
+    return loaded
+
+
+def describe(o):
+    """Return what matters about C{o} in a form that can be compared."""
+    def names(obs):
+        return [None if ob is None else ob.fullName() for ob in obs]
+    annotation = getattr(o, 'annotation', None)
+    # The decorators of classes are only used while processing.
+    decorators = o.decorators if isinstance(o, model.Function) else None
+    parsed_type = epydoc2stan.type2stan(o)
+    return {
+        'class': type(o).__name__,
+        'fullName': o.fullName(),
+        'kind': o.kind,
+        'docstring': o.docstring,
+        'privacy': o.privacyClass,
+        'linenumber': getattr(o, 'linenumber', None),
+        'contents': sorted(o.contents),
+        'orderedcontents': names(o.orderedcontents),
+        'parentMod': names([o.parentMod]),
+        'argspec': getattr(o, 'argspec', None),
+        'bases': getattr(o, 'bases', None),
+        'baseobjects': names(getattr(o, 'baseobjects', ())),
+        'subclasses': names(getattr(o, 'subclasses', ())),
+        'imports': getattr(o, '_localNameToFullName_map', None),
+        'all': getattr(o, 'all', None),
+        'annotation': annotation and astor.to_source(annotation),
+        'decorators': decorators and [astor.to_source(d)
+                                      for d in decorators],
+        'parsed_docstring': getattr(o, 'parsed_docstring', None) is not None,
+        'parsed_type': parsed_type and flatten(parsed_type),
+        'isinterface': getattr(o, 'isinterface', None),
+        'implements': getattr(o, 'implements_directly', None),
+        'implementedby': names(getattr(o, 'implementedby_directly', None)
+                               or ()),
+        }
+
+
+def assertSameSystem(system, loaded):
+    assert [describe(o) for o in loaded.orderedallobjects] == \
+           [describe(o) for o in system.orderedallobjects]
+    assert [o.fullName() for o in loaded.rootobjects] == \
+           [o.fullName() for o in system.rootobjects]
+    assert loaded.packages == system.packages
+
+
+def test_roundtrip(tmpdir):
+    """
+    A loaded system has the same objects as the one that was saved.
+    """
+    system = model.System()
+    fromText('''
+    class Base(object):
+        pass
+    ''', modname='b', system=system)
+    fromText('''
+    """
+    @var documented: In the docstring.
+    """
+    import os.path as p
+    from b import Base
+    __all__ = ['C']
+
+    class C(Base):
+        """
+        @ivar x: An instance variable.
+        @type x: L{int}
+        """
+        y: int = 1
+        @staticmethod
+        def f(a, b=2, *args, **kw):
+            "Function docstring."
+        def __init__(self):
+            self.x = 1
+            self._hidden = p
+        def f(self):
+            pass
+    class D(C):
+        pass
+    ''', modname='a', system=system)
+    system.addPrivacyRule(model.PrivacyClass.HIDDEN, 'a.D')
+    loaded = roundTrip(system, tmpdir)
+    assertSameSystem(system, loaded)
+    assert loaded.allobjects['a.C'].mro == [
+        loaded.allobjects['a.C'], loaded.allobjects['b.Base']]
+    assert loaded.allobjects['a.D'].privacyClass is model.PrivacyClass.HIDDEN
+
+
+def test_roundtrip_zope(tmpdir):
+    """
+    The interfaces that classes implement are saved.
+    """
+    system = processPackage(
+        'interfaceallgames', systemcls=zopeinterface.ZopeInterfaceSystem)
+    loaded = roundTrip(system, tmpdir)
+    assert isinstance(loaded, zopeinterface.ZopeInterfaceSystem)
+    assertSameSystem(system, loaded)
+
+
+def test_privacy_rules(tmpdir):
+    """
+    The privacy rules are saved, and rules added after loading take
+    precedence over them.
+    """
+    system = model.System()
+    fromText('''
+    def f(): pass
+    def g(): pass
+    ''', modname='mod', system=system)
+    system.addPrivacyRule(model.PrivacyClass.PRIVATE, 'mod.*')
+    loaded = roundTrip(system, tmpdir)
+    assert loaded.allobjects['mod.f'].privacyClass is \
+           model.PrivacyClass.PRIVATE
+    loaded.addPrivacyRule(model.PrivacyClass.VISIBLE, 'mod.g')
+    assert loaded.allobjects['mod.f'].privacyClass is \
+           model.PrivacyClass.PRIVATE
+    assert loaded.allobjects['mod.g'].privacyClass is \
+           model.PrivacyClass.VISIBLE
+
+
+def test_load_not_a_model(tmpdir):
+    """
+    Loading a file that is not a model fails with a ValueError.
+    """
+    path = tmpdir.join('model')
+    path.write('not a model')
+    with pytest.raises(ValueError) as e:
+        snapshot.load(str(path))
+    assert 'is not a pydoctor model' in str(e.value)
+
+
+def test_load_other_version(tmpdir):
+    """
+    Models saved in another version of the format are refused.
+    """
+    path = tmpdir.join('model')
+    text = '{"format": "pydoctor-model", "version": 0}'
+    path.write_binary(zlib.compress(text.encode('ascii')))
+    with pytest.raises(ValueError) as e:
+        snapshot.load(str(path))
+    assert 'version 0 of the model format' in str(e.value)
@@ -0,0 +1,90 @@
+"""
+Tests for L{pydoctor.stats}.
+"""
+from __future__ import print_function
+
+import pstats
+
+from pydoctor import stats
+
+
+def test_nested_spans(monkeypatch):
+    """
+    The time spent in a nested span does not count for the span around it.
+    """
+    now = [0]
+    monkeypatch.setattr(stats, '_clock', lambda: now[0])
+    s = stats.Stats()
+    with s.span('outer'):
+        now[0] += 1
+        with s.span('inner'):
+            now[0] += 10
+            with s.span('outer'):
+                now[0] += 100
+            now[0] += 1000
+        now[0] += 10000
+    assert s.times == {'outer': 10101, 'inner': 1010}
+    assert s.calls == {'outer': 2, 'inner': 1}
+
+
+def test_merge():
+    """
+    The spans and counters of another instance can be added.
+    """
+    s = stats.Stats()
+    s.times['parsing'] = 1.0
+    s.calls['parsing'] = 1
+    s.count('modules', 2)
+    other = stats.Stats()
+    other.times.update({'parsing': 2.0, 'links': 3.0})
+    other.calls.update({'parsing': 4, 'links': 5})
+    other.count('modules')
+    other.count('pages', 7)
+    s.merge(other.asDict())
+    assert s.times == {'parsing': 3.0, 'links': 3.0}
+    assert s.calls == {'parsing': 5, 'links': 5}
+    assert s.counters == {'modules': 3, 'pages': 7}
+
+
+def test_merge_profiles(tmpdir):
+    """
+    The profiles taken by an instance made by L{stats.Stats.forWorker} are
+    saved together with the ones taken by the instance it was made from.
+    """
+    def work():
+        return sum(range(100))
+    s = stats.Stats(['parsing'])
+    with s.span('parsing'):
+        work()
+    worker = s.forWorker()
+    assert worker.profiles == {'parsing': None}
+    for _ in range(2):
+        with worker.span('parsing'):
+            work()
+    s.merge(worker.asDict(), worker.profileData())
+    assert s.calls == {'parsing': 3}
+    paths = s.saveProfiles(str(tmpdir))
+    assert paths == [str(tmpdir.join('parsing.prof'))]
+    profile = pstats.Stats(paths[0])
+    calls = [v[1] for k, v in profile.stats.items() if k[2] == 'work']
+    assert calls == [3]
+
+
+def test_profile(tmpdir):
+    """
+    A profiled span is profiled every time it is entered, including when it
+    is entered inside itself.
+    """
+    def work():
+        return sum(range(100))
+    s = stats.Stats(['parsing', 'links'])
+    for _ in range(2):
+        with s.span('parsing'):
+            with s.span('parsing'):
+                work()
+            work()
+    paths = s.saveProfiles(str(tmpdir))
+    assert paths == [str(tmpdir.join('parsing.prof'))]
+    profile = pstats.Stats(paths[0])
+    calls = [v[1] for k, v in profile.stats.items() if k[2] == 'work']
+    assert calls == [4]
@@ -1,5 +1,6 @@
 from __future__ import print_function
 
+import datetime
 import os
 import shutil
 import tempfile
@@ -7,7 +8,7 @@ from io import BytesIO
 
 import pytest
 from pydoctor import model, templatewriter
-from pydoctor.templatewriter import pages, writer
+from pydoctor.templatewriter import pages, util, writer
 from pydoctor.test.test_astbuilder import fromText
 from pydoctor.test.test_packages import processPackage
 
@@ -123,3 +124,203 @@ def test_multipleInheritanceNewClass(className):
 
     assert "methodA" in html
     assert "methodB" in html
+
+
+def writeIncrementally(system, targetdir):
+    """
+    Write the individual pages of C{system} to C{targetdir} in incremental
+    mode and return the names of the pages that were actually rendered.
+    """
+    system.options.htmlincremental = True
+    w = writer.TemplateWriter(targetdir)
+    w.system = system
+    written = []
+    def writeDocsForOne(ob, fobj, pclass=None):
+        written.append(ob.fullName())
+        writer.TemplateWriter.writeDocsForOne(w, ob, fobj, pclass)
+    w.writeDocsForOne = writeDocsForOne
+    w.writeIndividualFiles(system.rootobjects)
+    return sorted(written)
+
+def test_incremental(tmpdir):
+    """
+    In incremental mode, a page is only rendered again when something it
+    shows has changed.
+    """
+    targetdir = str(tmpdir)
+    everything = writeIncrementally(processPackage("basic"), targetdir)
+    assert 'basic.mod.C' in everything
+    assert os.path.isfile(os.path.join(targetdir, 'basic.mod.C.html'))
+
+    assert writeIncrementally(processPackage("basic"), targetdir) == []
+
+    system = processPackage("basic")
+    system.allobjects['basic.mod.D'].docstring = "Changed docstring."
+    assert writeIncrementally(system, targetdir) == [
+        'basic', 'basic.mod', 'basic.mod.D']
+    with open(os.path.join(targetdir, 'basic.mod.D.html')) as f:
+        assert 'Changed docstring.' in f.read()
+
+def test_incremental_base_class(tmpdir):
+    """
+    Changing a base class renders the pages of its subclasses again, since
+    they show inherited members.
+    """
+    targetdir = str(tmpdir)
+    writeIncrementally(processPackage("basic"), targetdir)
+    system = processPackage("basic")
+    system.allobjects['basic.mod.C.f'].docstring = "Changed docstring."
+    assert writeIncrementally(system, targetdir) == [
+        'basic', 'basic.mod', 'basic.mod.C', 'basic.mod.D']
+
+def test_incremental_xref(tmpdir):
+    """
+    A page is rendered again when one of its cross references resolves
+    differently, even though the page itself did not change.
+    """
+    targetdir = str(tmpdir)
+    def makeSystem(withTarget):
+        system = model.System()
+        fromText('"""See L{m2.f}."""', modname='m1', system=system)
+        if withTarget:
+            fromText('def f(): pass', modname='m2', system=system)
+        return system
+    assert writeIncrementally(makeSystem(False), targetdir) == ['m1']
+    assert writeIncrementally(makeSystem(False), targetdir) == []
+    assert writeIncrementally(makeSystem(True), targetdir) == ['m1', 'm2']
+    with open(os.path.join(targetdir, 'm1.html')) as f:
+        assert 'href="m2.html#f"' in f.read()
+
+def test_incremental_templates(tmpdir):
+    """
+    All pages are rendered again when the template directory or the
+    templates in it change.
+    """
+    targetdir = str(tmpdir.mkdir('out'))
+    templatedir = tmpdir.mkdir('templates')
+    def makeSystem(templatedir):
+        system = model.System()
+        fromText('"""Module docstring."""', modname='mod', system=system)
+        system.options.templatedir = templatedir
+        return system
+    assert writeIncrementally(makeSystem(None), targetdir) == ['mod']
+    assert writeIncrementally(makeSystem(None), targetdir) == []
+    assert writeIncrementally(makeSystem(str(templatedir)), targetdir) == [
+        'mod']
+    assert writeIncrementally(makeSystem(str(templatedir)), targetdir) == []
+
+    with open(util.templatefile('common.html')) as f:
+        common = f.read()
+    templatedir.join('common.html').write(
+        common.replace('<body>', '<body><p>Custom template</p>'))
+    assert writeIncrementally(makeSystem(str(templatedir)), targetdir) == [
+        'mod']
+    assert writeIncrementally(makeSystem(str(templatedir)), targetdir) == []
+
+def test_parallel_output_identical(tmpdir):
+    """
+    Rendering pages in several worker processes produces exactly the same
+    files as rendering them serially.
+    """
+    outputs = []
+    for jobs in (1, 3):
+        system = processPackage("basic")
+        system.options.jobs = jobs
+        system.options.htmlfunctionpages = True
+        system.buildtime = datetime.datetime(2020, 1, 1)
+        targetdir = tmpdir.join('jobs%d' % (jobs,))
+        w = writer.TemplateWriter(str(targetdir))
+        w.system = system
+        w.prepOutputDirectory()
+        w.writeIndividualFiles(system.rootobjects, functionpages=True)
+        outputs.append(dict((f.basename, f.read_binary())
+                            for f in targetdir.listdir()))
+    serial, parallel = outputs
+    assert 'basic.mod.C.html' in serial
+    assert serial == parallel
+
+def test_flattenToFile_streams():
+    """
+    Pages are written to their file in pieces while they are flattened,
+    not as one string at the end.
+    """
+    src = ['"""Module docstring."""']
+    for i in range(200):
+        src.append('def f%d(a, b):\n    """%s"""' % (i, 'Words. ' * 50))
+    mod = fromText('\n'.join(src))
+    writes = []
+    class RecordingFile(BytesIO):
+        def write(self, data):
+            writes.append(data)
+            return BytesIO.write(self, data)
+    out = RecordingFile()
+    writer.flattenToFile(out, pages.ModulePage(mod))
+    assert len(writes) > 2
+    assert max(len(data) for data in writes) < len(out.getvalue())
+    assert 'f199' in out.getvalue().decode()
+
+def test_TimedFile_chunks():
+    """
+    L{writer._TimedFile} joins small writes into chunks and writes what is
+    left when flushed.
+    """
+    out = BytesIO()
+    writes = []
+    class RecordingFile(object):
+        def write(self, data):
+            writes.append(data)
+            out.write(data)
+    timed = writer._TimedFile(RecordingFile(), model.System().stats)
+    timed.chunksize = 10
+    for _ in range(7):
+        timed.write(b'abc')
+    assert writes == [b'abcabcabcabc']
+    timed.flush()
+    assert writes == [b'abcabcabcabc', b'abcabcabc']
+    timed.flush()
+    assert len(writes) == 2
+    assert out.getvalue() == b'abc' * 7
+
+def test_planPages():
+    """
+    The page plan lists every visible object that gets its own page, with
+    the file to write it to and the page class to render it with, parents
+    before their children.
+    """
+    system = processPackage("basic")
+    w = writer.TemplateWriter('')
+    w.system = system
+    plan = w.planPages(system.rootobjects)
+    names = [ob.fullName() for ob, _, _ in plan]
+    assert names[0] == 'basic'
+    assert names.index('basic.mod') < names.index('basic.mod.C')
+    assert 'basic.mod.C.f' not in names
+    for ob, filename, pclass in plan:
+        assert ob.isVisible
+        assert filename == ob.fullName() + '.html'
+        assert pclass is writer.pageClassFor(ob)
+    assert dict((ob.fullName(), pclass) for ob, _, pclass in plan)[
+        'basic.mod.C'] is pages.ClassPage
+
+    withFunctions = w.planPages(system.rootobjects, functionpages=True)
+    assert 'basic.mod.C.f' in [ob.fullName() for ob, _, _ in withFunctions]
+
+def test_template_dir(tmpdir):
+    """
+    Templates in the --template-dir directory replace the ones pydoctor
+    comes with, and each template is loaded once.
+    """
+    mod = fromText('"""Module docstring."""', modname='mod')
+    system = mod.system
+    with open(util.templatefile('common.html')) as f:
+        common = f.read()
+    tmpdir.join('common.html').write(
+        common.replace('<body>', '<body><p>Custom template</p>'))
+    assert 'Custom template' not in getHTMLOf(mod)
+
+    system.options.templatedir = str(tmpdir)
+    assert 'Custom template' in getHTMLOf(mod)
+    assert util.templateloader(system, 'common.html') is \
+        util.templateloader(system, 'common.html')
+    assert util.templatefile('table.html', str(tmpdir)) == \
+        util.templatefile('table.html')
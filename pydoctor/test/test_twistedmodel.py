@@ -1,5 +1,6 @@
 from __future__ import print_function
 
+from pydoctor import model
 from pydoctor.model import Class, Module, Package
 from pydoctor.twistedmodel import TwistedSystem
 
@@ -25,3 +26,22 @@ def test_doesnt_include_test_package():
 
     p = Package(system, "test", "package doc")
     assert not p.isVisible
+
+
+def test_proto_helpers_visible():
+    system = TwistedSystem()
+    twisted = Package(system, "twisted", "package doc")
+    system.addObject(twisted)
+    test = Package(system, "test", "package doc", twisted)
+    system.addObject(test)
+    helpers = Module(system, "proto_helpers", "module doc", test)
+    system.addObject(helpers)
+    private = Class(system, "_Private", "some doc", helpers)
+    system.addObject(private)
+    other = Module(system, "test_other", "module doc", test)
+    system.addObject(other)
+
+    assert test.isVisible
+    assert helpers.isVisible
+    assert private.privacyClass is model.PrivacyClass.VISIBLE
+    assert not other.isVisible
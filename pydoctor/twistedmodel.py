@@ -68,6 +68,7 @@ def deprecatedToUsefulText(name, deprecated):
 
 
 class TwistedFunction(zopeinterface.ZopeInterfaceFunction):
+    __slots__ = ()
 
     def docsources(self):
 
@@ -91,18 +92,16 @@ class TwistedSystem(zopeinterface.ZopeInterfaceSystem):
     defaultBuilder = TwistedASTBuilder
     Function = TwistedFunction
 
+    default_privacy_rules = (
+        # twisted.test itself is shown, for the sake of proto_helpers.
+        (model.PrivacyClass.HIDDEN, 'twisted.test.*'),
+        (model.PrivacyClass.VISIBLE, 'twisted.test.proto_helpers'),
+        (model.PrivacyClass.VISIBLE, 'twisted.test.proto_helpers.*'),
+        (model.PrivacyClass.HIDDEN, 'twisted.words.xish.yappsrt'),
+        )
+
     def privacyClass(self, obj):
-        o = obj
-        if o.fullName() == 'twisted.test':
-            # Match this package exactly, so that proto_helpers
-            # below is visible
-            return model.PrivacyClass.VISIBLE
-        while o:
-            if o.fullName() == 'twisted.words.xish.yappsrt':
-                return model.PrivacyClass.HIDDEN
-            if o.fullName() == 'twisted.test.proto_helpers':
-                return model.PrivacyClass.VISIBLE
-            if isinstance(o, model.Package) and o.name == 'test':
-                return model.PrivacyClass.HIDDEN
-            o = o.parent
+        if isinstance(obj, model.Package) and obj.name == 'test' and \
+               obj.fullName() != 'twisted.test':
+            return model.PrivacyClass.HIDDEN
         return super(TwistedSystem, self).privacyClass(obj)
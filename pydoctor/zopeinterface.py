@@ -5,8 +5,8 @@ from __future__ import print_function
 import ast
 import re
 
-import astor
 from pydoctor import astbuilder, model
+from pydoctor.astutils import node2source
 from six import text_type
 
 
@@ -65,6 +65,8 @@ class ZopeInterfaceClass(model.Class):
 
 
 class ZopeInterfaceFunction(model.Function):
+    __slots__ = ()
+
     def docsources(self):
         for source in super(ZopeInterfaceFunction, self).docsources():
             yield source
@@ -80,7 +82,7 @@ class ZopeInterfaceFunction(model.Function):
 def addInterfaceInfoToScope(scope, interfaceargs):
     for arg in interfaceargs:
         if not isinstance(arg, tuple):
-            fullName = scope.expandName(astor.to_source(arg).strip())
+            fullName = scope.expandName(node2source(arg))
         else:
             fullName = arg[1]
         obj = scope.system.objForFullName(fullName)
@@ -149,7 +151,7 @@ class ZopeInterfaceModuleVisitor(astbuilder.ModuleVistor):
         if isinstance(node.func, ast.Name):
             name = node.func.id
         elif isinstance(node.func, ast.Attribute):
-            name = astor.to_source(node).strip().split("(")[0]
+            name = node2source(node).split("(")[0]
         elif isinstance(node.func, ast.Call):
             return self.funcNameFromCall(node.func)
         else:
@@ -230,7 +232,7 @@ class ZopeInterfaceModuleVisitor(astbuilder.ModuleVistor):
 
     def visit_Call_zope_interface_classImplements(self, funcName, node):
         clsname = self.builder.current.expandName(
-            astor.to_source(node.args[0]).strip())
+            node2source(node.args[0]))
         if clsname not in self.system.allobjects:
             self.builder.system.msg(
                 "parsing",